@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+import log
+
+
+class AccountState:
+    # fetch_balances返回{币种: (可用, 冻结)}，fetch_positions返回{合约: 带方向的持仓量}，现货没有持仓传None
+    # 余额和持仓分开拉取、分开计时，查哪部分只拉哪部分；有私有ws推送时查询全部走内存
+    def __init__(self, fetch_balances, fetch_positions=None, max_age=1, interval=60):
+        self.fetchers = {"balance": fetch_balances}
+        if fetch_positions is not None:
+            self.fetchers["position"] = fetch_positions
+        self.max_age = max_age
+        self.interval = interval
+        self.balances = {}
+        self.positions = {}
+        self.updated = {}
+        self.times = {"balance": 0, "position": 0}
+        self.invalidated = 0
+        self.streaming = False
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.tasks = {}
+        self.thread = None
+        self.running = False
+
+    # part为None时返回最旧那部分的秒数
+    def age(self, part=None):
+        parts = [part] if part else self.fetchers
+        return time.time() - min(self.times[part] for part in parts)
+
+    def stale(self, part=None):
+        if part is None:
+            return any(self.stale(part) for part in self.fetchers)
+        # 有推送时只要有过一次快照就不再同步请求，没有推送时超过max_age重新拉快照
+        if self.streaming and self.times[part]:
+            return False
+        return self.age(part) > self.max_age
+
+    # 从未拉过，或自己的订单成交后失效
+    def expired(self, part):
+        return not self.times[part]
+
+    def merge(self, store, part, snapshot, start):
+        # 拉快照期间收到的推送比快照新，保留推送的值
+        for key in set(store) | set(snapshot):
+            if self.updated.get((part, key), 0) > start:
+                continue
+            if key in snapshot:
+                store[key] = snapshot[key]
+            else:
+                del store[key]
+
+    def apply(self, part, snapshot, start):
+        with self.lock:
+            self.merge(self.balances if part == "balance" else self.positions, part, snapshot, start)
+            # 快照开始后又有自己的成交，快照可能是成交前的，仍视为过期
+            self.times[part] = time.time() if start >= self.invalidated else 0
+
+    # 自己的订单成交后调用；没有推送时下一次查询重新拉快照，避免拿到成交前的持仓
+    def invalidate(self):
+        with self.lock:
+            self.invalidated = time.time()
+            if not self.streaming:
+                self.times = {"balance": 0, "position": 0}
+
+    def pull(self, part):
+        start = time.time()
+        snapshot = self.fetchers[part]()
+        if snapshot is None:
+            return False
+        self.apply(part, snapshot, start)
+        return True
+
+    async def pull_async(self, part):
+        start = time.time()
+        snapshot = await self.fetchers[part]()
+        if snapshot is None:
+            return False
+        self.apply(part, snapshot, start)
+        return True
+
+    # part为None时余额和持仓都拉
+    def reconcile(self, part=None):
+        results = [self.pull(part) for part in ([part] if part else list(self.fetchers))]
+        return all(results)
+
+    async def reconcile_async(self, part=None):
+        results = await asyncio.gather(*[self.pull_async(part) for part in ([part] if part else list(self.fetchers))])
+        return all(results)
+
+    # 查询前调用：失效时在调用方拉这一部分，只是超过max_age时先返回旧值并在后台刷新
+    def refresh(self, part):
+        if self.expired(part):
+            self.reconcile(part)
+        elif self.stale(part) and self.begin(part):
+            threading.Thread(target=self.background, args=(part,), daemon=True).start()
+
+    async def refresh_async(self, part):
+        if self.expired(part):
+            await self.reconcile_async(part)
+        elif self.stale(part) and self.begin(part):
+            self.tasks[part] = asyncio.ensure_future(self.background_async(part))
+
+    # 同一部分同时只有一个后台刷新
+    def begin(self, part):
+        with self.lock:
+            if part in self.pending:
+                return False
+            self.pending.add(part)
+            return True
+
+    def background(self, part):
+        try:
+            self.reconcile(part)
+        except Exception as error:
+            log.error("account", part=part, error=error)
+        finally:
+            self.pending.discard(part)
+
+    async def background_async(self, part):
+        try:
+            await self.reconcile_async(part)
+        except Exception as error:
+            log.error("account", part=part, error=error)
+        finally:
+            self.pending.discard(part)
+            self.tasks.pop(part, None)
+
+    def on_balance(self, coin, available, frozen):
+        with self.lock:
+            self.balances[coin] = (available, frozen)
+            self.times["balance"] = self.updated[("balance", coin)] = time.time()
+
+    def on_position(self, contract, size):
+        with self.lock:
+            if size:
+                self.positions[contract] = size
+            else:
+                self.positions.pop(contract, None)
+            self.times["position"] = self.updated[("position", contract)] = time.time()
+
+    # 返回(可用, 冻结, 状态已有多少秒未更新)
+    def balance(self, coin):
+        available, frozen = self.balances.get(coin, (0, 0))
+        return available, frozen, self.age("balance")
+
+    # 返回(持仓量, 状态已有多少秒未更新)
+    def position(self, contract):
+        return self.positions.get(contract, 0), self.age("position")
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    # 即使有推送也定期用REST对账，修正漏掉的推送
+    def run(self):
+        while self.running:
+            try:
+                self.reconcile()
+            except Exception as error:
+                log.error("account", error=error)
+            time.sleep(self.interval)
+
+    async def run_async(self):
+        while True:
+            try:
+                await self.reconcile_async()
+            except Exception as error:
+                log.error("account", error=error)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,38 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+# 各批量接口单次请求最多包含的订单数
+MEXC_SPOT_ORDERS = 20
+MEXC_SPOT_CANCELS = 20
+MEXC_FUTURE_ORDERS = 50
+MEXC_FUTURE_CANCELS = 50
+GATE_SPOT_ORDERS = 10
+GATE_SPOT_CANCELS = 20
+GATE_FUTURE_ORDERS = 10
+GATE_FUTURE_CANCELS = 20
+
+pool = ThreadPoolExecutor(8)
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+# send发送一块并按顺序返回每一项的(是否成功, 结果)；多块时并行发送，结果仍按输入顺序拼接
+def dispatch(send, items, size):
+    parts = chunks(list(items), size)
+    if len(parts) <= 1:
+        results = [send(part) for part in parts]
+    else:
+        results = pool.map(send, parts)
+    return [result for part in results for result in part]
+
+
+async def dispatch_async(send, items, size):
+    results = await asyncio.gather(*(send(part) for part in chunks(list(items), size)))
+    return [result for part in results for result in part]
+
+
+# 整块请求失败时块内每一项都返回同一个错误
+def failed(response, count):
+    return [(False, response)] * count
@@ -0,0 +1,107 @@
+import json
+import os
+import time
+import tracemalloc
+import requests
+from metrics import Histogram
+from scheduler import Scheduler, LIMITS
+from cex import Mexc, Gate
+from cex_future import MexcFuture, GateFuture
+
+# BENCH_COUNT控制每项的调用次数，默认值保证整套压测在几十秒内跑完；不走网络的微基准按倍数放大
+COUNT = int(os.environ.get("BENCH_COUNT", 300))
+MICRO_COUNT = COUNT * 100
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DATA = os.path.join(ROOT, "data")
+# 每次运行的结果写入results.json；每秒次数比baseline.json低超过BENCH_TOLERANCE(默认1即一半)算退化
+# 分位数只精确到微秒，微基准上不稳定，所以用整段计时的每秒次数比较
+# BENCH_UPDATE=1时不比较，用本次结果更新baseline.json
+RESULTS_PATH = os.path.join(ROOT, "results.json")
+BASELINE_PATH = os.path.join(ROOT, "baseline.json")
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", 1))
+UPDATE = bool(os.environ.get("BENCH_UPDATE"))
+results = {}
+
+
+# 录制的20档深度原始字节
+def load(name):
+    with open(os.path.join(DATA, name), "rb") as f:
+        return f.read()
+
+
+# 压测测的是客户端本身，限频调度器放开
+def unlimited():
+    return Scheduler({key: (1e9, 1e9) for key in LIMITS})
+
+
+def clients(url):
+    scheduler = unlimited()
+    mexc = Mexc(requests.Session(), "key", "secret", scheduler=scheduler)
+    gate = Gate(requests.Session(), "key", "secret", scheduler=scheduler)
+    mexc_future = MexcFuture("127.0.0.1", "key", "secret", 10, warm_up=False, scheduler=scheduler)
+    gate_future = GateFuture("127.0.0.1", "key", "secret", 10, warm_up=False, scheduler=scheduler)
+    for client in (mexc, gate, mexc_future, gate_future):
+        client.base = url
+    return mexc, gate, mexc_future, gate_future
+
+
+# 重复调用fn，返回每秒次数、延迟分位数(秒)和内存峰值(字节)，用于离线对比性能
+# tracemalloc会拖慢调用，内存峰值在计时之后单独跑memory_count次测量
+def benchmark(fn, count=1000, warm_up=10, memory_count=100):
+    for _ in range(warm_up):
+        fn()
+    histogram = Histogram()
+    start = time.perf_counter()
+    for _ in range(count):
+        call_start = time.perf_counter()
+        fn()
+        histogram.record(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    for _ in range(memory_count):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rps": count / elapsed,
+        "p50": histogram.percentile(50),
+        "p99": histogram.percentile(99),
+        "max": histogram.max,
+        "peak_memory": peak
+    }
+
+
+def load_json(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+baseline = load_json(BASELINE_PATH)
+
+
+def report(name, result):
+    print(f"{name:<36} {result['rps']:>9.0f}/s  p50 {result['p50'] * 1e3:8.3f} ms  p99 {result['p99'] * 1e3:8.3f} ms"
+          f"  max {result['max'] * 1e3:8.3f} ms  peak {result['peak_memory'] / 1024:8.1f} KiB")
+    results[name] = result
+    if not UPDATE and name in baseline:
+        limit = baseline[name]["rps"] / (1 + TOLERANCE)
+        assert result["rps"] >= limit, f"{name} {result['rps']:.0f}/s < baseline limit {limit:.0f}/s"
+    return result
+
+
+def run(name, fn, count=COUNT):
+    assert fn(), name
+    return report(name, benchmark(fn, count, memory_count=min(count, 50)))
+
+
+# 压测结束时由conftest调用；更新基线时与旧基线合并，只跑部分压测不会丢掉其它项
+def save():
+    if not results:
+        return
+    with open(RESULTS_PATH, "w") as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+    if UPDATE:
+        with open(BASELINE_PATH, "w") as f:
+            json.dump({**baseline, **results}, f, indent=1, sort_keys=True)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# 仓库是平铺的模块，压测时把仓库根目录加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_sessionfinish(session, exitstatus):
+    from common import save
+    save()
@@ -0,0 +1,32 @@
+import itertools
+import pytest
+from mock_server import MockProcess
+from common import clients, run
+
+ids = itertools.count(1)
+
+
+# 服务端在子进程里运行且不记录请求，内存峰值只包含客户端
+@pytest.fixture(scope="module")
+def exchange():
+    with MockProcess(history=0) as process:
+        yield process
+
+
+def test_spot_clients(exchange):
+    mexc, gate, _, _ = clients(exchange.url)
+    for client in (mexc, gate):
+        run(f"{client.name} spot tiker", client.tiker)
+        run(f"{client.name} spot account_snapshot", client.account_snapshot)
+        run(f"{client.name} spot buy", lambda: client.buy("BTC_USDT", 100.0, 0.01))
+        run(f"{client.name} spot place_orders x20",
+            lambda: all(ok for ok, _ in client.place_orders([("BTC_USDT", "sell", 101.0, 0.01)] * 20)), 100)
+
+
+def test_future_clients(exchange):
+    _, _, mexc_future, gate_future = clients(exchange.url)
+    for client in (mexc_future, gate_future):
+        run(f"{client.name} future depth", lambda: client.depth("BTC_USDT", 20))
+        run(f"{client.name} future account_snapshot", client.account_snapshot)
+        run(f"{client.name} future order", lambda: client.order("BTC_USDT", 100.0, 1, f"t-{next(ids)}", 1))
+        run(f"{client.name} future detail", client.detail)
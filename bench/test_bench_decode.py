@@ -0,0 +1,46 @@
+import json
+import re
+import pytest
+from cex_future import MexcFuture, GateFuture
+from common import MICRO_COUNT, benchmark, load, report
+
+# decode.py里orjson是可选依赖，没有安装时跳过对比
+orjson = pytest.importorskip("orjson")
+
+NUMBER = rb"(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)"
+# 原来depth()用的惰性解码：正则只扫出最优价和时间，解析档位时再完整解码
+SCANS = {
+    "mexc": [re.compile(rb'"bids"\s*:\s*\[\s*\[\s*' + NUMBER), re.compile(rb'"asks"\s*:\s*\[\s*\[\s*' + NUMBER),
+             re.compile(rb'"timestamp"\s*:\s*' + NUMBER)],
+    "gate": [re.compile(rb'"bids"\s*:\s*\[\s*\{\s*"p"\s*:\s*"' + NUMBER + rb'"'),
+             re.compile(rb'"asks"\s*:\s*\[\s*\{\s*"p"\s*:\s*"' + NUMBER + rb'"'),
+             re.compile(rb'"current"\s*:\s*' + NUMBER)]
+}
+
+
+def scan(venue, raw):
+    return [float(pattern.search(raw).group(1)) for pattern in SCANS[venue]]
+
+
+def top(venue, depth):
+    if venue == "mexc":
+        return [depth["data"]["bids"][0][0], depth["data"]["asks"][0][0], depth["data"]["timestamp"]]
+    return [float(depth["bids"][0]["p"]), float(depth["asks"][0]["p"]), depth["current"]]
+
+
+def test_lazy_scan_vs_orjson():
+    for client, venue in ((MexcFuture, "mexc"), (GateFuture, "gate")):
+        raw = load(f"{venue}_depth_20.json")
+        assert scan(venue, raw) == top(venue, orjson.loads(raw))
+        report(f"{venue} json.loads top", benchmark(lambda: top(venue, json.loads(raw)), MICRO_COUNT))
+        lazy = report(f"{venue} regex scan top", benchmark(lambda: scan(venue, raw), MICRO_COUNT))
+        eager = report(f"{venue} orjson.loads top", benchmark(lambda: top(venue, orjson.loads(raw)), MICRO_COUNT))
+        # depth()的调用方(Sizer、scanner、DepthPublisher)都会接着解析档位，惰性解码要再完整解码一次
+        lazy_full = report(f"{venue} regex scan + parse_depth",
+                           benchmark(lambda: (scan(venue, raw), client.parse_depth(orjson.loads(raw), "asks")),
+                                     MICRO_COUNT))
+        full = report(f"{venue} orjson.loads + parse_depth",
+                      benchmark(lambda: (top(venue, depth := orjson.loads(raw)), client.parse_depth(depth, "asks")),
+                                MICRO_COUNT))
+        print(f"{venue} regex scan vs orjson: top only {lazy['rps'] / eager['rps']:.2f}x, "
+              f"with parse_depth {lazy_full['rps'] / full['rps']:.2f}x")
@@ -0,0 +1,41 @@
+import pytest
+from cex_future import MexcFuture, GateFuture
+from common import MICRO_COUNT, benchmark, load, report
+
+orjson = pytest.importorskip("orjson")
+
+QUANTITY = 2000
+
+
+# 改动前的写法：parse_depth之后逐档累加
+def walk(lines, quantity):
+    filled = notional = 0
+    worst = None
+    for line in lines:
+        size = min(abs(float(line[1])), quantity - filled)
+        filled += size
+        notional += size * float(line[0])
+        worst = float(line[0])
+        if filled >= quantity:
+            break
+    return filled, notional, worst
+
+
+def test_order_book_vs_parse_depth():
+    for client, venue in ((MexcFuture, "mexc"), (GateFuture, "gate")):
+        raw = load(f"{venue}_depth_20.json")
+        expected = walk(client.parse_depth(orjson.loads(raw), "asks"), QUANTITY)
+        book = client.order_book(orjson.loads(raw), "asks")
+        assert book.fill(QUANTITY)[0] == expected[0] and book.fill(QUANTITY)[2] == expected[2]
+        assert abs(book.fill(QUANTITY)[1] - expected[1]) < 1e-6 * expected[1]
+        report(f"{venue} decode only", benchmark(lambda: orjson.loads(raw), MICRO_COUNT))
+        report(f"{venue} parse_depth + walk",
+               benchmark(lambda: walk(client.parse_depth(orjson.loads(raw), "asks"), QUANTITY), MICRO_COUNT))
+        report(f"{venue} order_book + fill",
+               benchmark(lambda: client.order_book(orjson.loads(raw), "asks").fill(QUANTITY), MICRO_COUNT))
+        # 只查一次时建OrderBook比直接逐档累加慢；Sizer按版本缓存，同一份深度上反复估算时累计数组只算一次
+        depth = client.parse_depth(orjson.loads(raw), "asks")
+        report(f"{venue} walk x10 quantities",
+               benchmark(lambda: [walk(depth, quantity) for quantity in range(200, 2200, 200)], MICRO_COUNT))
+        report(f"{venue} fill x10 quantities",
+               benchmark(lambda: [book.fill(quantity) for quantity in range(200, 2200, 200)], MICRO_COUNT))
@@ -0,0 +1,37 @@
+import requests
+from requests_toolbelt.adapters.source import SourceAddressAdapter
+from urllib3 import disable_warnings
+from urllib3.exceptions import InsecureRequestWarning
+from mock_server import MockProcess, self_signed
+from cex_future import new_session
+from common import COUNT, benchmark, clients, report, run
+
+disable_warnings(InsecureRequestWarning)
+
+
+# 改动前每个请求新建一个绑定源IP的session，连接用完即丢，每次都要重新做TCP+TLS握手
+def fresh_get(url):
+    session = requests.Session()
+    session.mount("https://", SourceAddressAdapter("127.0.0.1"))
+    with session:
+        return session.get(url, timeout=5, verify=False).ok
+
+
+# 真实交易所都是https，模拟交易所用临时的自签名证书，握手开销才算得进去
+def test_pooled_session_vs_fresh_session(tmp_path):
+    certfile, keyfile = self_signed(str(tmp_path))
+    with MockProcess(history=0, certfile=certfile, keyfile=keyfile) as exchange:
+        url = exchange.url + "/api/v1/contract/depth/BTC_USDT"
+        session = new_session("127.0.0.1")
+        before = report("fresh session per request", benchmark(lambda: fresh_get(url), COUNT, memory_count=50))
+        after = report("pooled new_session", benchmark(lambda: session.get(url, timeout=5, verify=False).ok, COUNT,
+                                                       memory_count=50))
+        print(f"pooled session p50 {before['p50'] / after['p50']:.1f}x faster")
+        assert after["p50"] < before["p50"]
+        # 经过客户端的完整一次深度请求；warm_up后连接池里的连接都已握手
+        _, _, mexc_future, gate_future = clients(exchange.url)
+        for client in (mexc_future, gate_future):
+            client.warm_up()
+            pool = next(iter(client.sessions.values())).get_adapter(exchange.url).poolmanager
+            assert sum(pool.pools[key].num_connections for key in pool.pools.keys()) == client.pool_size
+            run(f"{client.name} future depth (pooled)", lambda: client.depth("BTC_USDT", 20))
@@ -0,0 +1,64 @@
+import hashlib
+import hmac
+import json
+from urllib.parse import urlencode
+from sign import MexcSigner, GateSigner, GATE_EMPTY_PAYLOAD
+from common import MICRO_COUNT, benchmark, report
+
+NOW = 1760790000.123
+GET_PARAMS = {"symbol": "BTC_USDT", "page_num": "1", "page_size": "100", "states": "2"}
+POST_PARAMS = {"symbol": "BTC_USDT", "price": "67431.2", "vol": 1, "side": 1, "type": 1, "openType": 1,
+               "leverage": 10, "externalOid": "t-1"}
+
+
+class FixedClock:
+    def now(self):
+        return NOW
+
+
+# 改动前每次签名都重新用secret初始化hmac、json.dumps再encode
+def old_mexc(key, secret, method, params):
+    t = str(int(NOW * 1000))
+    if method == "POST":
+        plaintext = key + t + json.dumps(params, separators=(",", ":"))
+    else:
+        params_list = []
+        for param in params:
+            params_list.append(param + "=" + params[param])
+        plaintext = key + t + "&".join(sorted(params_list))
+    return hmac.new(secret.encode("utf-8"), plaintext.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def old_gate(secret, method, url, params):
+    payload = GATE_EMPTY_PAYLOAD
+    query = ""
+    if method == "POST":
+        payload = hashlib.sha512(json.dumps(params, separators=(",", ":")).encode("utf-8")).hexdigest()
+    else:
+        query = urlencode(params)
+    plaintext = "%s\n%s\n%s\n%s\n%s" % (method, url, query, payload, str(NOW))
+    return hmac.new(secret.encode("utf-8"), plaintext.encode("utf-8"), hashlib.sha512).hexdigest()
+
+
+def signatures(name, result):
+    report(name, result)
+    return result["rps"]
+
+
+def test_signatures_per_second():
+    mexc = MexcSigner("key", "secret", FixedClock())
+    gate = GateSigner("key", "secret", FixedClock())
+    url = "/api/v4/futures/usdt/orders"
+    # 同样的输入两种写法签名一致(POST的body序列化不同，只比较GET)
+    assert mexc.headers("GET", GET_PARAMS)[0]["Signature"] == old_mexc("key", "secret", "GET", GET_PARAMS)
+    assert gate.headers("GET", url, GET_PARAMS)[0]["SIGN"] == old_gate("secret", "GET", url, GET_PARAMS)
+    for method, params in (("GET", GET_PARAMS), ("POST", POST_PARAMS)):
+        before = signatures(f"mexc {method} per-call hmac",
+                            benchmark(lambda: old_mexc("key", "secret", method, params), MICRO_COUNT))
+        after = signatures(f"mexc {method} MexcSigner", benchmark(lambda: mexc.headers(method, params), MICRO_COUNT))
+        print(f"mexc {method} {after / before:.2f}x signatures/s")
+        before = signatures(f"gate {method} per-call hmac",
+                            benchmark(lambda: old_gate("secret", method, url, params), MICRO_COUNT))
+        after = signatures(f"gate {method} GateSigner",
+                           benchmark(lambda: gate.headers(method, url, params), MICRO_COUNT))
+        print(f"gate {method} {after / before:.2f}x signatures/s")
@@ -0,0 +1,201 @@
+import asyncio
+import fcntl
+import json
+import os
+import threading
+import time
+import log
+
+
+# 同一文件被多个客户端共用，保存时进程内用锁、进程间用文件锁，避免互相覆盖对方的条目
+file_locks = {}
+file_locks_lock = threading.Lock()
+
+
+def file_lock(path):
+    with file_locks_lock:
+        return file_locks.setdefault(os.path.abspath(path), threading.Lock())
+
+
+class ContractCache:
+    # min_interval为两次全量拉取的最小间隔，查不到的合约(未上市或已下架)在间隔内不会再触发拉取
+    def __init__(self, client, ttl=3600, path=None, min_interval=60):
+        self.client = client
+        self.ttl = ttl
+        self.path = path
+        self.min_interval = min_interval
+        self.contracts = {}
+        self.time = 0
+        self.attempted = 0
+        self.lock = threading.Lock()
+        self.fetch_lock = threading.Lock()
+        if path:
+            self.load()
+
+    # detail()不带参数时一次返回全部合约
+    def prefetch(self):
+        self.attempted = time.time()
+        return self.store(self.client.detail())
+
+    async def prefetch_async(self):
+        self.attempted = time.time()
+        return self.store(await self.client.detail())
+
+    def store(self, detail):
+        if not detail:
+            return False
+        with self.lock:
+            self.contracts = self.client.parse_detail(detail)
+            self.time = time.time()
+        if self.path:
+            self.save()
+        return True
+
+    def due(self, symbol):
+        now = time.time()
+        if now - self.attempted < self.min_interval:
+            return False
+        return now - self.time > self.ttl or symbol not in self.contracts
+
+    def lookup(self, symbol):
+        contract = self.contracts.get(symbol)
+        if contract is None:
+            raise KeyError(f"{self.client.name} contract {symbol} not found")
+        return contract
+
+    def get(self, symbol):
+        if self.due(symbol):
+            # 多个线程同时过期时只拉取一次
+            with self.fetch_lock:
+                if self.due(symbol):
+                    self.prefetch()
+        return self.lookup(symbol)
+
+    async def get_async(self, symbol):
+        if self.due(symbol):
+            await self.prefetch_async()
+        return self.lookup(symbol)
+
+    # 全部合约名，超过ttl才重新拉取
+    def symbols(self):
+        if self.age() > self.ttl:
+            with self.fetch_lock:
+                if self.age() > self.ttl:
+                    self.prefetch()
+        return sorted(self.contracts)
+
+    async def symbols_async(self):
+        if self.age() > self.ttl:
+            await self.prefetch_async()
+        return sorted(self.contracts)
+
+    def invalidate(self, symbol=None):
+        with self.lock:
+            if symbol:
+                self.contracts.pop(symbol, None)
+            else:
+                self.contracts = {}
+                self.time = 0
+            self.attempted = 0
+
+    def age(self):
+        return time.time() - self.time
+
+    def save(self):
+        with file_lock(self.path), open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            data = {}
+            if os.path.exists(self.path):
+                with open(self.path) as file:
+                    data = json.load(file)
+            data[self.client.name] = {"time": self.time, "contracts": self.contracts}
+            tmp = f"{self.path}.{os.getpid()}.{self.client.name}.tmp"
+            with open(tmp, "w") as file:
+                json.dump(data, file)
+            os.replace(tmp, self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as file:
+            data = json.load(file).get(self.client.name)
+        if not data:
+            return False
+        with self.lock:
+            self.contracts = data["contracts"]
+            self.time = data["time"]
+        return True
+
+
+class TickerCache:
+    def __init__(self, client, interval=1):
+        self.client = client
+        self.interval = interval
+        self.prices = {}
+        self.time = 0
+        self.lock = threading.Lock()
+        self.async_lock = asyncio.Lock()
+        self.thread = None
+        self.running = False
+
+    def refresh(self):
+        prices = self.client.tiker()
+        self.prices = prices
+        self.time = time.time()
+        return prices
+
+    async def refresh_async(self):
+        prices = await self.client.tiker()
+        self.prices = prices
+        self.time = time.time()
+        return prices
+
+    def snapshot(self):
+        if self.age() > self.interval:
+            # 多个线程同时过期时只让一个去请求，其余等待后直接用新快照
+            with self.lock:
+                if self.age() > self.interval:
+                    self.refresh()
+        return self.prices
+
+    async def snapshot_async(self):
+        if self.age() > self.interval:
+            async with self.async_lock:
+                if self.age() > self.interval:
+                    await self.refresh_async()
+        return self.prices
+
+    def get(self, symbol):
+        return self.snapshot().get(symbol)
+
+    async def get_async(self, symbol):
+        return (await self.snapshot_async()).get(symbol)
+
+    def age(self):
+        return time.time() - self.time
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            try:
+                with self.lock:
+                    self.refresh()
+            except Exception as error:
+                log.error("tickers", venue=self.client.name, error=error)
+            time.sleep(self.interval)
+
+    async def run_async(self):
+        while True:
+            try:
+                async with self.async_lock:
+                    await self.refresh_async()
+            except Exception as error:
+                log.error("tickers", venue=self.client.name, error=error)
+            await asyncio.sleep(self.interval)
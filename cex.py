@@ -1,254 +1,444 @@
-from urllib.parse import urlencode
 import time
-import hashlib
-import hmac
-import json
-from pprint import pprint
 from urllib3 import disable_warnings
 from urllib3.exceptions import InsecureRequestWarning
+from sign import MexcSigner, GateSigner
+from cache import TickerCache
+from volume import VolumeTracker
+from account import AccountState
+from retry import RetryPolicy, mexc_retryable, gate_retryable
+from scheduler import default_scheduler, endpoint_kind
+import decode
+import batch
+import flow
+import log
+from clock import ClockSync
+from exchange import SpotExchange, register
 
 
-class Mexc:
-    def __init__(self, ip, key, secret):
-        self.base = "https://www.mexc.com"
-        self.name = "MEXC"
-        self.ip = ip
-        self.key = key
-        self.secret = secret
-        disable_warnings(InsecureRequestWarning)
+# 同步和异步客户端共用的参数构造、响应解析和请求流程(见flow.py)，发请求由各自的request负责
+class MexcApi:
+    base = "https://www.mexc.com"
+    name = "MEXC"
+    retryable = staticmethod(mexc_retryable)
 
-    def request(self, method, url, params):
-        t = str(int(time.time() * 1000))
-        if method == "POST":
-            plaintext = self.key + t + json.dumps(params)
-        else:
-            params_list = []
-            for param in params:
-                params_list.append(param + "=" + params[param])
-            plaintext = self.key + t + "&".join(sorted(params_list))
-        signature = hmac.new(self.secret.encode("utf-8"), plaintext.encode("utf-8"), hashlib.sha256).hexdigest()
-        headers = {
-            "ApiKey": self.key,
-            "Request-Time": t,
-            "Signature": signature,
-            "Content-Type": "application/json"
-        }
-        try:
-            if method == "POST":
-                response = self.ip.request(method, self.base + url, json=params, headers=headers)
-            else:
-                response = self.ip.request(method, self.base + url, params=params, headers=headers)
-            response_json = response.json()
-            if response_json["code"] == 200:
-                return True, response_json
-            else:
-                return False, response.text
-        except Exception as error:
-            return False, error
+    @staticmethod
+    def parse_response(content):
+        response_json = decode.loads(content)
+        if response_json["code"] == 200:
+            return True, response_json
+        return False, content.decode("utf-8")
 
-    def buy(self, symbol, price, quantity):
-        params = {
-            "symbol": symbol,
-            "price": "%.10f" % price,
-            "quantity": "%.10f" % quantity,
-            "trade_type": "BID",
-            "order_type": "IMMEDIATE_OR_CANCEL"
-        }
-        status, response = self.request("POST", "/open/api/v2/order/place", params)
-        print("mexc buy :", response)
-        return status
+    def server_time_steps(self):
+        status, response = yield ("GET", "/open/api/v2/common/timestamp", {}), None
+        return response["data"] / 1000 if status else None
 
-    def sell(self, symbol, price, quantity):
-        params = {
+    @staticmethod
+    def order_params(symbol, side, price, quantity):
+        # 买单IOC，卖单挂限价单
+        return {
             "symbol": symbol,
             "price": "%.10f" % price,
             "quantity": "%.10f" % quantity,
-            "trade_type": "ASK",
-            "order_type": "LIMIT_ORDER"
+            "trade_type": "BID" if side == "buy" else "ASK",
+            "order_type": "IMMEDIATE_OR_CANCEL" if side == "buy" else "LIMIT_ORDER"
         }
-        status, response = self.request("POST", "/open/api/v2/order/place", params)
-        print("mexc sell :", response)
+
+    def place_steps(self, symbol, side, price, quantity):
+        params = self.order_params(symbol, side, price, quantity)
+        start = time.perf_counter()
+        status, response = yield ("POST", "/open/api/v2/order/place", params), None
+        self.account.invalidate()
+        log.result("order", status, venue=self.name, symbol=symbol, side=side, price=price, quantity=quantity,
+                   latency=time.perf_counter() - start, response=response)
         return status
 
-    def cancel(self, symbol):
-        status, response = self.request("DELETE", "/open/api/v2/order/cancel_by_symbol", {"symbol": symbol})
-        print("mexc cancel :", response)
+    def cancel_steps(self, symbol):
+        status, response = yield ("DELETE", "/open/api/v2/order/cancel_by_symbol", {"symbol": symbol}), None
+        log.result("cancel", status, venue=self.name, symbol=symbol, response=response)
         return status
 
-    def tiker(self):
-        while True:
-            status, response = self.request("GET", "/open/api/v2/market/ticker", {})
-            if status:
-                price_dict = {}
-                for coinTiker in response["data"]:
-                    price_dict[coinTiker["symbol"]] = float(coinTiker["last"])
-                return price_dict
-            else:
-                print("mexc tiker :", response)
-                time.sleep(1)
+    def place_batch_steps(self, params):
+        start = time.perf_counter()
+        status, response = yield ("POST", "/open/api/v2/order/place_batch", params), None
+        self.account.invalidate()
+        log.result("batch_order", status, venue=self.name, count=len(params), latency=time.perf_counter() - start,
+                   response=response)
+        if not status:
+            return batch.failed(response, len(params))
+        return [(bool(order.get("order_id")), order) for order in response["data"]]
 
-    def balance(self, coin, includ_frozen=False):
-        while True:
-            status, response = self.request("GET", "/open/api/v2/account/info", {})
-            if status:
-                if response["data"]:
-                    if coin in response["data"]:
-                        if includ_frozen:
-                            available = float(response["data"][coin]["available"])
-                            return available + float(response["data"][coin]["frozen"])
-                        else:
-                            return float(response["data"][coin]["available"])
-                    else:
-                        return 0
-            print("mexc balance :", response)
-            time.sleep(1)
-
-    # amount函数统计过去一小时某交易对在买/卖方向上成交金额(以USDT记且不统计还没有结束的订单)
-    def amount(self, symbol, side):
-        if side == "buy":
-            trade_type = "BID"
-        else:
-            trade_type = "ASK"
-        while True:
-            sign = True
-            usdt = 0
-            for states in ["FILLED", "PARTIALLY_CANCELED"]:
+    def cancel_batch_steps(self, order_ids):
+        status, response = yield ("DELETE", "/open/api/v2/order/cancel", {"order_ids": ",".join(order_ids)}), None
+        log.result("batch_cancel", status, venue=self.name, ids=order_ids, response=response)
+        if not status:
+            return batch.failed(response, len(order_ids))
+        return [(response["data"].get(order_id) == "success", response["data"].get(order_id)) for order_id in order_ids]
+
+    def tiker_steps(self):
+        response = yield ("GET", "/open/api/v2/market/ticker", {}), "mexc tiker"
+        return {coinTiker["symbol"]: float(coinTiker["last"]) for coinTiker in response["data"]}
+
+    # 余额快照：{币种: (可用, 冻结)}
+    def balance_snapshot_steps(self):
+        response = yield ("GET", "/open/api/v2/account/info", {}), "mexc balance"
+        return {coin: (float(balance["available"]), float(balance["frozen"]))
+                for coin, balance in (response["data"] or {}).items()}
+
+    # 账户快照：({币种: (可用, 冻结)}, {})
+    def account_snapshot_steps(self):
+        return (yield from self.balance_snapshot_steps()), {}
+
+    def balance_of(self, coin, include_frozen):
+        available, frozen, age = self.account.balance(coin)
+        return available + frozen if include_frozen else available
+
+    # 返回since(秒)之后创建的已结束订单[(订单id, "buy"/"sell", 创建时间, 成交金额)]
+    def fills_steps(self, symbol, since):
+        fills = []
+        for states in ["FILLED", "PARTIALLY_CANCELED"]:
+            start_time = since
+            while True:
                 params = {
                     "symbol": symbol,
-                    "start_time": str(int(time.time() - 36000)),
-                    "trade_type": trade_type,
-                    "states": states
+                    "start_time": str(int(start_time)),
+                    "states": states,
+                    "limit": "1000"
                 }
-                status, response = self.request("GET", "/open/api/v2/order/list", params)
-                if not status:
-                    print("mexc amount :", response)
-                    sign = False
-                    break
+                response = yield ("GET", "/open/api/v2/order/list", params), "mexc fills"
                 for order in response["data"]:
-                    usdt += float(order["deal_amount"])
-            if not sign:
-                time.sleep(1)
-                continue
-            return usdt
+                    side = "buy" if order["type"] == "BID" else "sell"
+                    fills.append((order["id"], side, order["create_time"] / 1000, float(order["deal_amount"])))
+                # 一页不满说明已经取完，否则从这一页最新的订单继续往后取
+                if len(response["data"]) < 1000:
+                    break
+                newest = max(order["create_time"] for order in response["data"]) / 1000
+                if int(newest) <= int(start_time):
+                    break
+                start_time = newest
+        return fills
 
-    def price(self, symbol):
-        return self.tiker().get(symbol)
+    # 未结束订单的创建时间(秒)
+    def open_times_steps(self, symbol):
+        params = {
+            "symbol": symbol,
+            "limit": "1000"
+        }
+        response = yield ("GET", "/open/api/v2/order/open_orders", params), "mexc open_orders"
+        return [order["create_time"] / 1000 for order in response["data"]]
 
+    # 统计过去一小时某交易对在买/卖方向上成交金额(以USDT记且不统计还没有结束的订单)
+    def amount_steps(self, symbol, side):
+        if self.volumes.stale(symbol):
+            cursor = self.volumes.cursor(time.time(), (yield from self.open_times_steps(symbol)))
+            self.volumes.update(symbol, (yield from self.fills_steps(symbol, self.volumes.since(symbol))), cursor)
+        return self.volumes.amount(symbol, "buy" if side == "buy" else "sell")
 
-class Gate:
-    def __init__(self, ip, key, secret):
-        self.base = "https://api.gateio.ws"
-        self.name = "GATE"
+
+@register("MEXC", "spot")
+class Mexc(MexcApi, SpotExchange):
+    # ips为额外的出口session，行情请求会分散到这些session上
+    def __init__(self, ip, key, secret, ticker_interval=1, retry=None, ips=None, scheduler=None, metrics=None,
+                 volume_window=3600, account_max_age=1):
         self.ip = ip
         self.key = key
         self.secret = secret
+        self.clock = ClockSync(self.server_time)
+        self.signer = MexcSigner(key, secret, self.clock)
         disable_warnings(InsecureRequestWarning)
+        self.tickers = TickerCache(self, ticker_interval)
+        self.volumes = VolumeTracker(volume_window)
+        self.account = AccountState(self.balance_snapshot, max_age=account_max_age)
+        self.metrics = metrics
+        self.retry = retry or RetryPolicy(metrics=metrics)
+        self.ips = [ip] + list(ips or [])
+        self.scheduler = scheduler or default_scheduler
 
-    def request(self, method, url, params, query_post=False):
-        payload = "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce" \
-                  "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e"
-        query = ""
-        if method == "POST" and not query_post:
-            payload = hashlib.sha512(json.dumps(params).encode("utf-8")).hexdigest()
-        else:
-            query = urlencode(params)
-        t = str(time.time())
-        plaintext = "%s\n%s\n%s\n%s\n%s" % (method, url, query, payload, t)
-        signature = hmac.new(self.secret.encode("utf-8"), plaintext.encode("utf-8"), hashlib.sha512).hexdigest()
-        headers = {
-            "Key": self.key,
-            "Timestamp": t,
-            "SIGN": signature,
-            "Content-Type": "application/json"
-        }
+    def request(self, method, url, params):
+        self.clock.ensure()
+        headers, body = self.signer.headers(method, params)
+        session = self.scheduler.acquire(self.name, endpoint_kind(method, url), self.ip, self.ips)
+        start = time.perf_counter()
+        received = 0
         try:
-            if method == "POST" and not query_post:
-                response = self.ip.request(method, self.base + url, json=params, headers=headers)
-            else:
-                response = self.ip.request(method, self.base + url, params=params, headers=headers)
-            if response.status_code == 200 or response.status_code == 201:
-                return True, response.json()
+            if method == "POST":
+                response = session.request(method, self.base + url, data=body, headers=headers)
             else:
-                return False, response.text
+                response = session.request(method, self.base + url, params=params, headers=headers)
+            received = len(response.content)
+            result = self.parse_response(response.content)
         except Exception as error:
-            return False, error
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
 
-    def buy(self, symbol, price, amount):
-        params = {
-            "currency_pair": symbol,
-            "side": "buy",
-            "amount": "%.10f" % amount,
-            "price": "%.10f" % price,
-            "time_in_force": "ioc"
-        }
-        status, response = self.request("POST", "/api/v4/spot/orders", params)
-        print("gate buy :")
-        pprint(response, sort_dicts=False)
-        return status
+    def server_time(self):
+        return flow.run(self, self.server_time_steps())
 
-    def sell(self, symbol, price, amount):
+    def buy(self, symbol, price, quantity):
+        return flow.run(self, self.place_steps(symbol, "buy", price, quantity))
+
+    def sell(self, symbol, price, quantity):
+        return flow.run(self, self.place_steps(symbol, "sell", price, quantity))
+
+    def cancel(self, symbol):
+        return flow.run(self, self.cancel_steps(symbol))
+
+    # orders为[(交易对, "buy"/"sell", 价格, 数量)]，按顺序返回每个订单的(是否成功, 结果)
+    def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return batch.dispatch(self.place_batch, params, batch.MEXC_SPOT_ORDERS)
+
+    def place_batch(self, params):
+        return flow.run(self, self.place_batch_steps(params))
+
+    # order_ids为订单号列表，按顺序返回每个订单的(是否成功, 结果)
+    def cancel_orders(self, order_ids):
+        return batch.dispatch(self.cancel_batch, order_ids, batch.MEXC_SPOT_CANCELS)
+
+    def cancel_batch(self, order_ids):
+        return flow.run(self, self.cancel_batch_steps(order_ids))
+
+    def tiker(self):
+        return flow.run(self, self.tiker_steps())
+
+    def account_snapshot(self):
+        return flow.run(self, self.account_snapshot_steps())
+
+    def balance_snapshot(self):
+        return flow.run(self, self.balance_snapshot_steps())
+
+    # include_frozen为统一接口的参数名，includ_frozen为原参数名，两者都可用
+    def balance(self, coin, include_frozen=False, includ_frozen=False):
+        self.account.refresh("balance")
+        return self.balance_of(coin, include_frozen or includ_frozen)
+
+    def balance_detail(self, coin):
+        self.account.refresh("balance")
+        return self.account.balance(coin)
+
+    def fills(self, symbol, since):
+        return flow.run(self, self.fills_steps(symbol, since))
+
+    def open_times(self, symbol):
+        return flow.run(self, self.open_times_steps(symbol))
+
+    def amount(self, symbol, side):
+        return flow.run(self, self.amount_steps(symbol, side))
+
+    def price(self, symbol):
+        return self.tickers.get(symbol)
+
+
+class GateApi:
+    base = "https://api.gateio.ws"
+    name = "GATE"
+    retryable = staticmethod(gate_retryable)
+
+    @staticmethod
+    def parse_response(status, content):
+        if status == 200 or status == 201:
+            return True, decode.loads(content)
+        return False, content.decode("utf-8")
+
+    def server_time_steps(self):
+        status, response = yield ("GET", "/api/v4/spot/time", {}), None
+        return response["server_time"] / 1000 if status else None
+
+    @staticmethod
+    def order_params(symbol, side, price, amount):
         params = {
             "currency_pair": symbol,
-            "side": "sell",
+            "side": side,
             "amount": "%.10f" % amount,
             "price": "%.10f" % price
         }
-        status, response = self.request("POST", "/api/v4/spot/orders", params)
-        print("gate sell :")
-        pprint(response, sort_dicts=False)
+        # 买单IOC，卖单挂限价单
+        if side == "buy":
+            params["time_in_force"] = "ioc"
+        return params
+
+    def place_steps(self, symbol, side, price, amount):
+        params = self.order_params(symbol, side, price, amount)
+        start = time.perf_counter()
+        status, response = yield ("POST", "/api/v4/spot/orders", params), None
+        self.account.invalidate()
+        log.result("order", status, venue=self.name, symbol=symbol, side=side, price=price, amount=amount,
+                   latency=time.perf_counter() - start, response=response)
         return status
 
-    def cancel(self, symbol):
-        status, response = self.request("DELETE", "/api/v4/spot/orders", {"currency_pair": symbol})
-        print("gate cancel :")
-        pprint(response, sort_dicts=False)
+    def cancel_steps(self, symbol):
+        status, response = yield ("DELETE", "/api/v4/spot/orders", {"currency_pair": symbol}), None
+        log.result("cancel", status, venue=self.name, symbol=symbol, response=response)
         return status
 
-    def tiker(self):
-        while True:
-            status, response = self.request("GET", "/api/v4/spot/tickers", {})
-            if status:
-                price_dict = {}
-                for coinTiker in response:
-                    price_dict[coinTiker["currency_pair"]] = float(coinTiker["last"])
-                return price_dict
-            else:
-                print("gate tiker :", response)
-            time.sleep(1)
+    @staticmethod
+    def cancel_params(orders):
+        return [{"currency_pair": symbol, "id": order_id} for symbol, order_id in orders]
 
-    def balance(self, coin, include_locked=False):
-        while True:
-            status, response = self.request("GET", "/api/v4/spot/accounts", {})
-            if status:
-                for account in response:
-                    if account["currency"] == coin:
-                        if include_locked:
-                            return float(account["available"]) + float(account["locked"])
-                        else:
-                            return float(account["available"])
-                return 0
-            else:
-                print("gate balance :", response)
-            time.sleep(1)
+    def place_batch_steps(self, params):
+        start = time.perf_counter()
+        status, response = yield ("POST", "/api/v4/spot/batch_orders", params), None
+        self.account.invalidate()
+        log.result("batch_order", status, venue=self.name, count=len(params), latency=time.perf_counter() - start,
+                   response=response)
+        if not status:
+            return batch.failed(response, len(params))
+        return [(order["succeeded"], order) for order in response]
 
-    # amount函数统计过去一小时某交易对在买/卖方向上成交金额(以USDT记且不统计还没有结束的订单)
-    def amount(self, symbol, side):
+    def cancel_batch_steps(self, params):
+        status, response = yield ("POST", "/api/v4/spot/cancel_batch_orders", params), None
+        log.result("batch_cancel", status, venue=self.name, ids=[order["id"] for order in params], response=response)
+        if not status:
+            return batch.failed(response, len(params))
+        return [(order["succeeded"], order) for order in response]
+
+    def tiker_steps(self):
+        response = yield ("GET", "/api/v4/spot/tickers", {}), "gate tiker"
+        return {coinTiker["currency_pair"]: float(coinTiker["last"]) for coinTiker in response}
+
+    # 余额快照：{币种: (可用, 冻结)}
+    def balance_snapshot_steps(self):
+        response = yield ("GET", "/api/v4/spot/accounts", {}), "gate balance"
+        return {account["currency"]: (float(account["available"]), float(account["locked"])) for account in response}
+
+    # 账户快照：({币种: (可用, 冻结)}, {})
+    def account_snapshot_steps(self):
+        return (yield from self.balance_snapshot_steps()), {}
+
+    def balance_of(self, coin, include_frozen):
+        available, locked, age = self.account.balance(coin)
+        return available + locked if include_frozen else available
+
+    # 按status分页查询订单，每页100条，直到某一页不满
+    def orders_steps(self, symbol, status, name, since=None):
+        orders = []
+        page = 1
         while True:
-            usdt = 0
             params = {
                 "currency_pair": symbol,
-                "status": "finished",
-                "from": str(int(time.time() - 36000)),
-                "side": side
+                "status": status,
+                "page": str(page),
+                "limit": "100"
             }
-            status, response = self.request("GET", "/api/v4/spot/orders", params)
-            if not status:
-                print("gate amount :", response)
-                time.sleep(1)
-                continue
-            for order in response:
-                usdt += float(order["filled_total"])
-            return usdt
+            if since is not None:
+                params["from"] = str(int(since))
+            response = yield ("GET", "/api/v4/spot/orders", params), name
+            orders.extend(response)
+            if len(response) < 100:
+                break
+            page += 1
+        return orders
+
+    # 返回since(秒)之后创建的已结束订单[(订单id, "buy"/"sell", 创建时间, 成交金额)]
+    def fills_steps(self, symbol, since):
+        orders = yield from self.orders_steps(symbol, "finished", "gate fills", since)
+        return [(order["id"], order["side"], float(order["create_time_ms"]) / 1000, float(order["filled_total"]))
+                for order in orders]
+
+    # 未结束订单的创建时间(秒)
+    def open_times_steps(self, symbol):
+        orders = yield from self.orders_steps(symbol, "open", "gate open_orders")
+        return [float(order["create_time_ms"]) / 1000 for order in orders]
+
+    # 统计过去一小时某交易对在买/卖方向上成交金额(以USDT记且不统计还没有结束的订单)
+    def amount_steps(self, symbol, side):
+        if self.volumes.stale(symbol):
+            cursor = self.volumes.cursor(time.time(), (yield from self.open_times_steps(symbol)))
+            self.volumes.update(symbol, (yield from self.fills_steps(symbol, self.volumes.since(symbol))), cursor)
+        return self.volumes.amount(symbol, side)
+
+
+@register("GATE", "spot")
+class Gate(GateApi, SpotExchange):
+    # ips为额外的出口session，行情请求会分散到这些session上
+    def __init__(self, ip, key, secret, ticker_interval=1, retry=None, ips=None, scheduler=None, metrics=None,
+                 volume_window=3600, account_max_age=1):
+        self.ip = ip
+        self.key = key
+        self.secret = secret
+        self.clock = ClockSync(self.server_time)
+        self.signer = GateSigner(key, secret, self.clock)
+        disable_warnings(InsecureRequestWarning)
+        self.tickers = TickerCache(self, ticker_interval)
+        self.volumes = VolumeTracker(volume_window)
+        self.account = AccountState(self.balance_snapshot, max_age=account_max_age)
+        self.metrics = metrics
+        self.retry = retry or RetryPolicy(metrics=metrics)
+        self.ips = [ip] + list(ips or [])
+        self.scheduler = scheduler or default_scheduler
+
+    def request(self, method, url, params, query_post=False):
+        self.clock.ensure()
+        headers, query, body = self.signer.headers(method, url, params, query_post)
+        if query:
+            url += "?" + query
+        session = self.scheduler.acquire(self.name, endpoint_kind(method, url), self.ip, self.ips)
+        start = time.perf_counter()
+        received = 0
+        try:
+            response = session.request(method, self.base + url, data=body, headers=headers)
+            received = len(response.content)
+            result = self.parse_response(response.status_code, response.content)
+        except Exception as error:
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
+
+    def server_time(self):
+        return flow.run(self, self.server_time_steps())
+
+    def buy(self, symbol, price, amount):
+        return flow.run(self, self.place_steps(symbol, "buy", price, amount))
+
+    def sell(self, symbol, price, amount):
+        return flow.run(self, self.place_steps(symbol, "sell", price, amount))
+
+    def cancel(self, symbol):
+        return flow.run(self, self.cancel_steps(symbol))
+
+    # orders为[(交易对, "buy"/"sell", 价格, 数量)]，按顺序返回每个订单的(是否成功, 结果)
+    def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return batch.dispatch(self.place_batch, params, batch.GATE_SPOT_ORDERS)
+
+    def place_batch(self, params):
+        return flow.run(self, self.place_batch_steps(params))
+
+    # orders为[(交易对, 订单号)]，按顺序返回每个订单的(是否成功, 结果)
+    def cancel_orders(self, orders):
+        return batch.dispatch(self.cancel_batch, self.cancel_params(orders), batch.GATE_SPOT_CANCELS)
+
+    def cancel_batch(self, params):
+        return flow.run(self, self.cancel_batch_steps(params))
+
+    def tiker(self):
+        return flow.run(self, self.tiker_steps())
+
+    def account_snapshot(self):
+        return flow.run(self, self.account_snapshot_steps())
+
+    def balance_snapshot(self):
+        return flow.run(self, self.balance_snapshot_steps())
+
+    # include_frozen为统一接口的参数名，include_locked为原参数名，两者都可用
+    def balance(self, coin, include_frozen=False, include_locked=False):
+        self.account.refresh("balance")
+        return self.balance_of(coin, include_frozen or include_locked)
+
+    def balance_detail(self, coin):
+        self.account.refresh("balance")
+        return self.account.balance(coin)
+
+    def fills(self, symbol, since):
+        return flow.run(self, self.fills_steps(symbol, since))
+
+    def open_times(self, symbol):
+        return flow.run(self, self.open_times_steps(symbol))
+
+    def amount(self, symbol, side):
+        return flow.run(self, self.amount_steps(symbol, side))
 
     def price(self, symbol):
-        return self.tiker().get(symbol)
+        return self.tickers.get(symbol)
@@ -0,0 +1,465 @@
+import time
+import aiohttp
+from sign import MexcSigner, GateSigner
+from cex import MexcApi, GateApi
+from cex_future import MexcFutureApi, GateFutureApi
+from retry import RetryPolicy
+from order_status import OrderStatus, mexc_done, gate_done
+from scheduler import default_scheduler, endpoint_kind
+import batch
+import flow
+from clock import ClockSync
+from volume import VolumeTracker
+from account import AccountState
+from cache import ContractCache, TickerCache
+
+
+# 与同步版不同，这里的ip是源地址字符串；多个客户端可以传入同一个session共享连接池
+def new_session(ip, pool_size=10):
+    connector = aiohttp.TCPConnector(local_addr=(ip, 0), limit=pool_size, ssl=False, keepalive_timeout=60)
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=5))
+
+
+class AsyncClient:
+    def __init__(self, ip, key, secret, session=None, pool_size=10, retry=None, ips=None, scheduler=None,
+                 metrics=None):
+        self.ip = ip
+        self.key = key
+        self.secret = secret
+        self.pool_size = pool_size
+        self.metrics = metrics
+        self.retry = retry or RetryPolicy(metrics=metrics)
+        # ips为额外的出口IP，行情请求会分散到这些IP上
+        self.ips = [ip] + list(ips or [])
+        self.sessions = {}
+        if session is not None:
+            self.sessions[ip] = session
+        self.scheduler = scheduler or default_scheduler
+
+    def get_session(self, ip=None):
+        ip = ip or self.ip
+        if ip not in self.sessions:
+            self.sessions[ip] = new_session(ip, self.pool_size)
+        return self.sessions[ip]
+
+    async def acquire(self, method, url):
+        return self.get_session(await self.scheduler.acquire_async(self.name, endpoint_kind(method, url), self.ip,
+                                                                   self.ips))
+
+    async def close(self):
+        for session in self.sessions.values():
+            await session.close()
+        self.sessions = {}
+
+    async def __aenter__(self):
+        self.get_session()
+        await self.clock.sync_async()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+
+# 参数构造、响应解析和请求流程与同步版共用(MexcApi等)，这里只有发请求的部分
+class AsyncMexc(MexcApi, AsyncClient):
+    def __init__(self, ip, key, secret, session=None, pool_size=10, retry=None, ips=None, scheduler=None,
+                 metrics=None, volume_window=3600, account_max_age=1, ticker_interval=1):
+        super().__init__(ip, key, secret, session, pool_size, retry, ips, scheduler, metrics)
+        self.tickers = TickerCache(self, ticker_interval)
+        self.volumes = VolumeTracker(volume_window)
+        self.account = AccountState(self.balance_snapshot, max_age=account_max_age)
+        self.clock = ClockSync(self.server_time)
+        self.signer = MexcSigner(key, secret, self.clock)
+
+    async def request(self, method, url, params):
+        headers, body = self.signer.headers(method, params)
+        if method == "POST":
+            kwargs = {"data": body}
+        else:
+            kwargs = {"params": params}
+        session = await self.acquire(method, url)
+        start = time.perf_counter()
+        received = 0
+        try:
+            async with session.request(method, self.base + url, headers=headers, **kwargs) as response:
+                raw = await response.read()
+            received = len(raw)
+            result = self.parse_response(raw)
+        except Exception as error:
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
+
+    async def server_time(self):
+        return await flow.run_async(self, self.server_time_steps())
+
+    async def buy(self, symbol, price, quantity):
+        return await flow.run_async(self, self.place_steps(symbol, "buy", price, quantity))
+
+    async def sell(self, symbol, price, quantity):
+        return await flow.run_async(self, self.place_steps(symbol, "sell", price, quantity))
+
+    async def cancel(self, symbol):
+        return await flow.run_async(self, self.cancel_steps(symbol))
+
+    # orders为[(交易对, "buy"/"sell", 价格, 数量)]，按顺序返回每个订单的(是否成功, 结果)
+    async def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return await batch.dispatch_async(self.place_batch, params, batch.MEXC_SPOT_ORDERS)
+
+    async def place_batch(self, params):
+        return await flow.run_async(self, self.place_batch_steps(params))
+
+    # order_ids为订单号列表，按顺序返回每个订单的(是否成功, 结果)
+    async def cancel_orders(self, order_ids):
+        return await batch.dispatch_async(self.cancel_batch, order_ids, batch.MEXC_SPOT_CANCELS)
+
+    async def cancel_batch(self, order_ids):
+        return await flow.run_async(self, self.cancel_batch_steps(order_ids))
+
+    async def tiker(self):
+        return await flow.run_async(self, self.tiker_steps())
+
+    async def account_snapshot(self):
+        return await flow.run_async(self, self.account_snapshot_steps())
+
+    async def balance_snapshot(self):
+        return await flow.run_async(self, self.balance_snapshot_steps())
+
+    # include_frozen为统一接口的参数名，includ_frozen为原参数名，两者都可用
+    async def balance(self, coin, include_frozen=False, includ_frozen=False):
+        await self.account.refresh_async("balance")
+        return self.balance_of(coin, include_frozen or includ_frozen)
+
+    async def balance_detail(self, coin):
+        await self.account.refresh_async("balance")
+        return self.account.balance(coin)
+
+    async def fills(self, symbol, since):
+        return await flow.run_async(self, self.fills_steps(symbol, since))
+
+    async def open_times(self, symbol):
+        return await flow.run_async(self, self.open_times_steps(symbol))
+
+    async def amount(self, symbol, side):
+        return await flow.run_async(self, self.amount_steps(symbol, side))
+
+    async def price(self, symbol):
+        return await self.tickers.get_async(symbol)
+
+
+class AsyncGate(GateApi, AsyncClient):
+    def __init__(self, ip, key, secret, session=None, pool_size=10, retry=None, ips=None, scheduler=None,
+                 metrics=None, volume_window=3600, account_max_age=1, ticker_interval=1):
+        super().__init__(ip, key, secret, session, pool_size, retry, ips, scheduler, metrics)
+        self.tickers = TickerCache(self, ticker_interval)
+        self.volumes = VolumeTracker(volume_window)
+        self.account = AccountState(self.balance_snapshot, max_age=account_max_age)
+        self.clock = ClockSync(self.server_time)
+        self.signer = GateSigner(key, secret, self.clock)
+
+    async def request(self, method, url, params, query_post=False):
+        headers, query, body = self.signer.headers(method, url, params, query_post)
+        if query:
+            url += "?" + query
+        session = await self.acquire(method, url)
+        start = time.perf_counter()
+        received = 0
+        try:
+            async with session.request(method, self.base + url, headers=headers, data=body) as response:
+                raw = await response.read()
+            received = len(raw)
+            result = self.parse_response(response.status, raw)
+        except Exception as error:
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
+
+    async def server_time(self):
+        return await flow.run_async(self, self.server_time_steps())
+
+    async def buy(self, symbol, price, amount):
+        return await flow.run_async(self, self.place_steps(symbol, "buy", price, amount))
+
+    async def sell(self, symbol, price, amount):
+        return await flow.run_async(self, self.place_steps(symbol, "sell", price, amount))
+
+    async def cancel(self, symbol):
+        return await flow.run_async(self, self.cancel_steps(symbol))
+
+    # orders为[(交易对, "buy"/"sell", 价格, 数量)]，按顺序返回每个订单的(是否成功, 结果)
+    async def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return await batch.dispatch_async(self.place_batch, params, batch.GATE_SPOT_ORDERS)
+
+    async def place_batch(self, params):
+        return await flow.run_async(self, self.place_batch_steps(params))
+
+    # orders为[(交易对, 订单号)]，按顺序返回每个订单的(是否成功, 结果)
+    async def cancel_orders(self, orders):
+        return await batch.dispatch_async(self.cancel_batch, self.cancel_params(orders), batch.GATE_SPOT_CANCELS)
+
+    async def cancel_batch(self, params):
+        return await flow.run_async(self, self.cancel_batch_steps(params))
+
+    async def tiker(self):
+        return await flow.run_async(self, self.tiker_steps())
+
+    async def account_snapshot(self):
+        return await flow.run_async(self, self.account_snapshot_steps())
+
+    async def balance_snapshot(self):
+        return await flow.run_async(self, self.balance_snapshot_steps())
+
+    # include_frozen为统一接口的参数名，include_locked为原参数名，两者都可用
+    async def balance(self, coin, include_frozen=False, include_locked=False):
+        await self.account.refresh_async("balance")
+        return self.balance_of(coin, include_frozen or include_locked)
+
+    async def balance_detail(self, coin):
+        await self.account.refresh_async("balance")
+        return self.account.balance(coin)
+
+    async def fills(self, symbol, since):
+        return await flow.run_async(self, self.fills_steps(symbol, since))
+
+    async def open_times(self, symbol):
+        return await flow.run_async(self, self.open_times_steps(symbol))
+
+    async def amount(self, symbol, side):
+        return await flow.run_async(self, self.amount_steps(symbol, side))
+
+    async def price(self, symbol):
+        return await self.tickers.get_async(symbol)
+
+
+class AsyncMexcFuture(MexcFutureApi, AsyncClient):
+    def __init__(self, ip, key, secret, leverage, session=None, pool_size=10, retry=None, ips=None,
+                 scheduler=None, metrics=None, account_max_age=1, contract_ttl=3600, contract_path=None):
+        super().__init__(ip, key, secret, session, pool_size, retry, ips, scheduler, metrics)
+        self.clock = ClockSync(self.server_time)
+        self.signer = MexcSigner(key, secret, self.clock)
+        self.leverage = leverage
+        self.order_status = OrderStatus(mexc_done)
+        self.account = AccountState(self.balance_snapshot, self.position_snapshot, account_max_age)
+        self.contracts = ContractCache(self, contract_ttl, contract_path)
+
+    async def request(self, method, url, params):
+        headers, body = self.signer.headers(method, params)
+        if method == "POST":
+            kwargs = {"data": body}
+        else:
+            kwargs = {"params": params}
+        session = await self.acquire(method, url)
+        start = time.perf_counter()
+        received = 0
+        try:
+            async with session.request(method, self.base + url, headers=headers, **kwargs) as response:
+                raw = await response.read()
+            received = len(raw)
+            result = self.parse_response(raw)
+        except Exception as error:
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
+
+    async def server_time(self):
+        return await flow.run_async(self, self.server_time_steps())
+
+    async def account_snapshot(self):
+        return await flow.run_async(self, self.account_snapshot_steps())
+
+    async def balance_snapshot(self):
+        return await flow.run_async(self, self.balance_snapshot_steps())
+
+    async def position_snapshot(self):
+        return await flow.run_async(self, self.position_snapshot_steps())
+
+    async def get_position(self, symbol=None):
+        await self.account.refresh_async("position")
+        return self.position_of(symbol)
+
+    async def change_position_mode(self, position_mode):
+        await flow.run_async(self, self.change_position_mode_steps(position_mode))
+
+    async def change_leverage(self, symbol):
+        await flow.run_async(self, self.change_leverage_steps(symbol))
+
+    async def balance(self):
+        await self.account.refresh_async("balance")
+        return self.account.balance("USDT")[0]
+
+    async def balance_detail(self, coin):
+        await self.account.refresh_async("balance")
+        return self.account.balance(coin)
+
+    async def position_detail(self, symbol):
+        await self.account.refresh_async("position")
+        return self.account.position(symbol)
+
+    async def symbols(self):
+        return await self.contracts.symbols_async()
+
+    async def submit_order(self, symbol, price, vol, external_order_id, precition):
+        return await flow.run_async(self, self.submit_order_steps(symbol, price, vol, external_order_id, precition))
+
+    async def order_filled(self, symbol, external_order_id, params, response):
+        filled = self.settled(symbol, external_order_id, params, response)
+        if filled is not None:
+            return filled
+        order, used = await self.order_status.wait_async(external_order_id,
+                                                         lambda: self.fetch_order(symbol, external_order_id))
+        return self.filled(symbol, external_order_id, params, order, used)
+
+    async def order(self, symbol, price, vol, external_order_id, precition):
+        params, response = await self.submit_order(symbol, price, vol, external_order_id, precition)
+        return await self.order_filled(symbol, external_order_id, params, response)
+
+    # orders为[(合约, 价格, 数量, 自定义订单号, 价格精度)]，按顺序返回每个订单的(是否成功, 结果)
+    # 结果可以和order_params一起传给order_filled确认成交
+    async def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return await batch.dispatch_async(self.place_batch, params, batch.MEXC_FUTURE_ORDERS)
+
+    async def place_batch(self, params):
+        return await flow.run_async(self, self.place_batch_steps(params))
+
+    # order_ids为交易所订单号列表，按顺序返回每个订单的(是否成功, 结果)
+    async def cancel_orders(self, order_ids):
+        return await batch.dispatch_async(self.cancel_batch, order_ids, batch.MEXC_FUTURE_CANCELS)
+
+    async def cancel_batch(self, order_ids):
+        return await flow.run_async(self, self.cancel_batch_steps(order_ids))
+
+    async def get_order(self, symbol, external_order_id):
+        return await flow.run_async(self, self.get_order_steps(symbol, external_order_id))
+
+    async def fetch_order(self, symbol, external_order_id):
+        return await flow.run_async(self, self.fetch_order_steps(symbol, external_order_id))
+
+    async def depth(self, symbol, limit):
+        return await flow.run_async(self, self.depth_steps(symbol, limit))
+
+    async def detail(self, symbol=None):
+        return await flow.run_async(self, self.detail_steps(symbol))
+
+    async def contract_multiplie(self, symbol):
+        return self.parse_multiplie(await self.contracts.get_async(symbol))
+
+    async def precition(self, symbol):
+        return self.parse_precition(await self.contracts.get_async(symbol))
+
+
+class AsyncGateFuture(GateFutureApi, AsyncClient):
+    def __init__(self, ip, key, secret, leverage, session=None, pool_size=10, retry=None, ips=None,
+                 scheduler=None, metrics=None, account_max_age=1, contract_ttl=3600, contract_path=None):
+        super().__init__(ip, key, secret, session, pool_size, retry, ips, scheduler, metrics)
+        self.clock = ClockSync(self.server_time)
+        self.signer = GateSigner(key, secret, self.clock)
+        self.leverage = leverage
+        self.order_status = OrderStatus(gate_done)
+        self.account = AccountState(self.balance_snapshot, self.position_snapshot, account_max_age)
+        self.contracts = ContractCache(self, contract_ttl, contract_path)
+
+    async def request(self, method, url, params, query_post=False):
+        headers, query, body = self.signer.headers(method, url, params, query_post)
+        if query:
+            url += "?" + query
+        session = await self.acquire(method, url)
+        start = time.perf_counter()
+        received = 0
+        try:
+            async with session.request(method, self.base + url, headers=headers, data=body) as response:
+                raw = await response.read()
+            received = len(raw)
+            result = self.parse_response(response.status, raw, response)
+        except Exception as error:
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
+
+    async def server_time(self):
+        return await flow.run_async(self, self.server_time_steps())
+
+    async def account_snapshot(self):
+        return await flow.run_async(self, self.account_snapshot_steps())
+
+    async def balance_snapshot(self):
+        return await flow.run_async(self, self.balance_snapshot_steps())
+
+    async def position_snapshot(self):
+        return await flow.run_async(self, self.position_snapshot_steps())
+
+    async def get_position(self, contract):
+        await self.account.refresh_async("position")
+        return self.account.position(contract)[0]
+
+    async def change_leverage(self, contract):
+        await flow.run_async(self, self.change_leverage_steps(contract))
+
+    async def balance(self):
+        await self.account.refresh_async("balance")
+        return self.account.balance("USDT")[0]
+
+    async def balance_detail(self, coin):
+        await self.account.refresh_async("balance")
+        return self.account.balance(coin)
+
+    async def position_detail(self, symbol):
+        await self.account.refresh_async("position")
+        return self.account.position(symbol)
+
+    async def symbols(self):
+        return await self.contracts.symbols_async()
+
+    async def submit_order(self, contract, price, size, text, precition):
+        return await flow.run_async(self, self.submit_order_steps(contract, price, size, text, precition))
+
+    async def order_filled(self, contract, text, params, response):
+        filled = self.settled(contract, text, params, response)
+        if filled is not None:
+            return filled
+        order, used = await self.order_status.wait_async(text, lambda: self.fetch_order(text))
+        return self.filled(contract, text, params, order, used)
+
+    async def order(self, contract, price, size, text, precition):
+        params, response = await self.submit_order(contract, price, size, text, precition)
+        return await self.order_filled(contract, text, params, response)
+
+    # orders为[(合约, 价格, 数量, 自定义订单号, 价格精度)]，按顺序返回每个订单的(是否成功, 结果)
+    # 结果可以和order_params一起传给order_filled确认成交
+    async def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return await batch.dispatch_async(self.place_batch, params, batch.GATE_FUTURE_ORDERS)
+
+    async def place_batch(self, params):
+        return await flow.run_async(self, self.place_batch_steps(params))
+
+    # order_ids为交易所订单号列表，按顺序返回每个订单的(是否成功, 结果)
+    async def cancel_orders(self, order_ids):
+        return await batch.dispatch_async(self.cancel_batch, order_ids, batch.GATE_FUTURE_CANCELS)
+
+    async def cancel_batch(self, order_ids):
+        return await flow.run_async(self, self.cancel_batch_steps(order_ids))
+
+    async def get_order(self, text):
+        return await flow.run_async(self, self.get_order_steps(text))
+
+    async def fetch_order(self, text):
+        return await flow.run_async(self, self.fetch_order_steps(text))
+
+    async def depth(self, contract, limit):
+        return await flow.run_async(self, self.depth_steps(contract, limit))
+
+    async def detail(self, contract=""):
+        return await flow.run_async(self, self.detail_steps(contract))
+
+    async def contract_multiplie(self, contract):
+        return self.parse_multiplie(await self.contracts.get_async(contract))
+
+    async def precition(self, contract):
+        return self.parse_precition(await self.contracts.get_async(contract))
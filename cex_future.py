@@ -1,115 +1,102 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from requests_toolbelt.adapters.source import SourceAddressAdapter
-import time
-import hashlib
-import hmac
-from urllib.parse import urlencode
-import json
 from urllib3 import disable_warnings
 from urllib3.exceptions import InsecureRequestWarning
 from math import log10
-from pprint import pprint
+from sign import MexcSigner, GateSigner
+from orderbook import OrderBook
+from cache import ContractCache
+from retry import RetryPolicy, FatalError, mexc_retryable, gate_retryable
+from order_status import OrderStatus, mexc_done, gate_done
+from scheduler import default_scheduler, endpoint_kind
+import decode
+import batch
+import flow
+import log
+from clock import ClockSync
+from exchange import FutureExchange, register
+from account import AccountState
 
 
-class MexcFuture:
-    def __init__(self, ip, key, secret, leverage):
-        self.base = "https://contract.mexc.com"
-        self.name = "MEXC"
-        self.ip = ip
-        self.key = key
-        self.secret = secret
-        self.leverage = leverage
-        disable_warnings(InsecureRequestWarning)
+def new_session(ip, pool_size=10):
+    # 长连接池绑定源IP，max_retries=1只重试连接错误(包括复用到已断开的连接)，不会重复发送已发出的订单
+    # http同样绑定，本地模拟交易所压测时走的是同一个连接池
+    session = requests.Session()
+    adapter = SourceAddressAdapter(ip, pool_connections=1, pool_maxsize=pool_size, max_retries=1)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
-    def request(self, method, url, params):
-        t = str(int(time.time() * 1000))
-        if method == "POST":
-            plaintext = self.key + t + json.dumps(params)
-        else:
-            params_list = []
-            for param in params:
-                params_list.append(param + "=" + params[param])
-            plaintext = self.key + t + "&".join(sorted(params_list))
-        signature = hmac.new(self.secret.encode("utf-8"), plaintext.encode("utf-8"), hashlib.sha256).hexdigest()
-        headers = {
-            "ApiKey": self.key,
-            "Request-Time": t,
-            "Signature": signature,
-            "Content-Type": "application/json"
-        }
+
+# 提前完成TCP+TLS握手；顺序请求只会建一个连接，所以每个session并发发pool_size个请求把池子填满
+def warm_sessions(sessions, base, pool_size, venue):
+    def head(session):
         try:
-            session = requests.Session()
-            session.mount("https://", SourceAddressAdapter(self.ip))
-            if method == "POST":
-                request = requests.Request(method, self.base + url, headers, json=params)
-            else:
-                request = requests.Request(method, self.base + url, headers, params=params)
-            prepared = session.prepare_request(request)
-            response = session.send(prepared, timeout=5, verify=False).json()
-            if response["code"] == 0:
-                return True, response
-            else:
-                return False, response
+            session.head(base, timeout=5, verify=False)
         except Exception as error:
-            return False, error
+            log.warning("warm_up", venue=venue, error=error)
+    targets = [session for session in sessions for _ in range(pool_size)]
+    with ThreadPoolExecutor(len(targets)) as pool:
+        list(pool.map(head, targets))
 
-    def get_position(self, symbol=None):
-        while True:
-            params = {}
-            if symbol:
-                params = {"symbol": symbol}
-            response = self.request("GET", "/api/v1/private/position/open_positions", params)
-            if response[0]:
-                if response[1]["data"]:
-                    if symbol:
-                        long = response[1]["data"][0]["positionType"] == 1
-                        return response[1]["data"][0]["holdVol"] if long else -response[1]["data"][0]["holdVol"]
-                    else:
-                        return True
-                else:
-                    return 0
-            else:
-                print(f"mexc get_position: {response[1]}")
-            time.sleep(1)
 
-    def change_position_mode(self, position_mode):
-        while True:
-            params = {"positionMode": position_mode}
-            response = self.request("POST", "/api/v1/private/position/change_position_mode", params)
-            if response[0]:
-                return None
-            else:
-                print(f"mexc change_position_mode: {response[1]}")
-            time.sleep(1)
+# 同步和异步客户端共用的参数构造、响应解析和请求流程(见flow.py)，发请求由各自的request负责
+class MexcFutureApi:
+    base = "https://contract.mexc.com"
+    name = "MEXC"
+    retryable = staticmethod(mexc_retryable)
 
-    def change_leverage(self, symbol):
+    @staticmethod
+    def parse_response(content):
+        response = decode.loads(content)
+        return response["code"] == 0, response
+
+    def server_time_steps(self):
+        status, response = yield ("GET", "/api/v1/contract/ping", {}), None
+        return response["data"] / 1000 if status else None
+
+    # 余额快照：{币种: (可用, 冻结)}
+    def balance_snapshot_steps(self):
+        assets = yield ("GET", "/api/v1/private/account/assets", {}), "mexc balance"
+        return {currency["currency"]: (currency["availableBalance"], currency["frozenBalance"])
+                for currency in assets["data"]}
+
+    # 持仓快照：{合约: 带方向的持仓量}
+    def position_snapshot_steps(self):
+        positions = yield ("GET", "/api/v1/private/position/open_positions", {}), "mexc get_position"
+        return {position["symbol"]: self.position_size(position) for position in positions["data"]}
+
+    # 账户快照：({币种: (可用, 冻结)}, {合约: 带方向的持仓量})
+    def account_snapshot_steps(self):
+        return (yield from self.balance_snapshot_steps()), (yield from self.position_snapshot_steps())
+
+    @staticmethod
+    def position_size(position):
+        return position["holdVol"] if position["positionType"] == 1 else -position["holdVol"]
+
+    # symbol为None时返回是否有任何持仓
+    def position_of(self, symbol):
+        if symbol:
+            return self.account.position(symbol)[0]
+        return True if self.account.positions else 0
+
+    def change_position_mode_steps(self, position_mode):
+        params = {"positionMode": position_mode}
+        yield ("POST", "/api/v1/private/position/change_position_mode", params), "mexc change_position_mode"
+
+    def change_leverage_steps(self, symbol):
         params = {
             "leverage": self.leverage,
             "openType": 2,
             "symbol": symbol,
             "positionType": 2
         }
-        while True:
-            response = self.request("POST", "/api/v1/private/position/change_leverage", params)
-            if response[0]:
-                return None
-            else:
-                print(f"mexc change_leverage: {response[1]}")
-            time.sleep(1)
-
-    def balance(self):
-        while True:
-            response = self.request("GET", "/api/v1/private/account/assets", {})
-            if response[0]:
-                for currency in response[1]["data"]:
-                    if currency["currency"] == "USDT":
-                        return currency["availableBalance"]
-            else:
-                print(f"mexc balance: {response[1]}")
-            time.sleep(1)
+        yield ("POST", "/api/v1/private/position/change_leverage", params), "mexc change_leverage"
 
-    def order(self, symbol, price, vol, external_order_id, precition):
-        params = {
+    def order_params(self, symbol, price, vol, external_order_id, precition):
+        return {
             "symbol": symbol,
             "price": f"{price:.{precition}}",
             "vol": vol if vol > 0 else -vol,
@@ -120,41 +107,80 @@ class MexcFuture:
             "externalOid": external_order_id,
             "positionMode": 2
         }
-        t = time.time()
-        response = self.request("POST", "/api/v1/private/order/submit", params)
-        print(f"mexc order(used {time.time() - t:.3f}s): {response[1]}\n")
-        get_order_response = self.get_order(symbol, external_order_id)
-        if "data" in get_order_response:
-            return get_order_response["data"]["dealVol"]
-        else:
-            pprint(params)
+
+    def submit_order_steps(self, symbol, price, vol, external_order_id, precition):
+        params = self.order_params(symbol, price, vol, external_order_id, precition)
+        start = time.perf_counter()
+        response = yield ("POST", "/api/v1/private/order/submit", params), None
+        log.result("order", response[0], venue=self.name, symbol=symbol, id=external_order_id, params=params,
+                   latency=time.perf_counter() - start, response=response[1])
+        return params, response
+
+    # 不用查询订单就能确定成交量时返回成交量，否则返回None
+    # mexc下单接口不返回成交量，需要再查订单；有私有ws推送时直接用推送结果
+    def settled(self, symbol, external_order_id, params, response):
+        if not response[0] and isinstance(response[1], dict):
+            # 交易所明确拒绝，订单不存在
+            log.error("order_rejected", venue=self.name, symbol=symbol, id=external_order_id, params=params)
             return 0
+        return None
 
-    def get_order(self, symbol, external_order_id):
-        while True:
-            params = {
-                "symbol": symbol,
-                "external_oid": external_order_id
-            }
-            response = self.request("GET", f"/api/v1/private/order/external/{symbol}/{external_order_id}", params)
-            if response[0]:
-                return response[1]
-            else:
-                print(f"mexc get_order: {response[1]}")
-            time.sleep(1)
+    # order为查询或推送得到的订单，确认不了成交时为None
+    def filled(self, symbol, external_order_id, params, order, used):
+        self.account.invalidate()
+        if order:
+            log.event("fill", venue=self.name, symbol=symbol, id=external_order_id, filled=order["dealVol"],
+                      latency=used)
+            return order["dealVol"]
+        log.error("fill_unconfirmed", venue=self.name, symbol=symbol, id=external_order_id, params=params)
+        return 0
 
-    def depth(self, symbol, limit):
+    def place_batch_steps(self, params):
+        start = time.perf_counter()
+        response = yield ("POST", "/api/v1/private/order/submit_batch", params), None
+        self.account.invalidate()
+        log.result("batch_order", response[0], venue=self.name, ids=[order["externalOid"] for order in params],
+                   latency=time.perf_counter() - start, response=response[1])
+        if not response[0]:
+            return batch.failed(response[1], len(params))
+        return [(not order.get("errorCode"), order) for order in response[1]["data"]]
+
+    def cancel_batch_steps(self, order_ids):
+        response = yield ("POST", "/api/v1/private/order/cancel", order_ids), None
+        log.result("batch_cancel", response[0], venue=self.name, ids=order_ids, response=response[1])
+        if not response[0]:
+            return batch.failed(response[1], len(order_ids))
+        return [(not order.get("errorCode"), order) for order in response[1]["data"]]
+
+    @staticmethod
+    def order_request(symbol, external_order_id):
+        params = {
+            "symbol": symbol,
+            "external_oid": external_order_id
+        }
+        return "GET", f"/api/v1/private/order/external/{symbol}/{external_order_id}", params
+
+    def get_order_steps(self, symbol, external_order_id):
+        return (yield self.order_request(symbol, external_order_id), "mexc get_order")
+
+    # 只查询一次，查不到返回None，由order_status决定是否继续查询
+    def fetch_order_steps(self, symbol, external_order_id):
+        response = yield self.order_request(symbol, external_order_id), None
+        return response[1]["data"] if response[0] else None
+
+    def depth_steps(self, symbol, limit):
         params = {
             "symbol": symbol,
             "limit": str(limit)
         }
-        response = self.request("GET", f"/api/v1/contract/depth/{symbol}", params)
+        response = yield ("GET", f"/api/v1/contract/depth/{symbol}", params), None
         if not response[0]:
-            print(f"mexc depth: {response[1]}", end=" " * 20 + "\r")
+            log.warning("depth", venue=self.name, symbol=symbol, response=response[1])
             return False
-        delay = time.time() * 1000 - response[1]["data"]["timestamp"]
+        delay = self.clock.now() * 1000 - response[1]["data"]["timestamp"]
         if delay > 120:
-            print(f"mexc depth: 获取时间过长，达{delay:.2f}ms", end=" " * 20 + "\r")
+            # 获取时间过长
+            log.warning("depth_stale", venue=self.name, symbol=symbol, delay=delay)
             return False
         else:
             return response[1], response[1]["data"]["bids"][0][0], \
@@ -164,146 +190,288 @@ class MexcFuture:
     def parse_depth(depth, side):
         return depth["data"][side]
 
-    def detail(self, symbol=None):
+    @staticmethod
+    def order_book(depth, side):
+        return OrderBook.from_mexc(depth, side)
+
+    def detail_steps(self, symbol=None):
         params = {}
         if symbol:
             params = {"symbol": symbol}
-        response = self.request("GET", "/api/v1/contract/detail", params)
+        response = yield ("GET", "/api/v1/contract/detail", params), None
         if response[0]:
             return response[1]
         else:
-            print(f"mexc detail: {response[1]}")
+            log.error("detail", venue=self.name, response=response[1])
             return False
 
-    def contract_multiplie(self, symbol):
-        return self.detail(symbol)["data"]["contractSize"]
+    @staticmethod
+    def parse_detail(detail):
+        return {contract["symbol"]: contract for contract in detail["data"]}
 
-    def precition(self, symbol):
-        return self.detail(symbol)["data"]["priceScale"]
+    @staticmethod
+    def parse_multiplie(contract):
+        return contract["contractSize"]
+
+    @staticmethod
+    def parse_precition(contract):
+        return contract["priceScale"]
 
 
-class GateFuture:
-    def __init__(self, ip, key, secret, leverage):
-        self.base = "https://api.gateio.ws"
-        self.name = "GATE"
+@register("MEXC", "future")
+class MexcFuture(MexcFutureApi, FutureExchange):
+    def __init__(self, ip, key, secret, leverage, pool_size=10, warm_up=True, contract_ttl=3600,
+                 contract_path=None, retry=None, ips=None, scheduler=None, metrics=None, account_max_age=1):
         self.ip = ip
         self.key = key
         self.secret = secret
+        self.clock = ClockSync(self.server_time)
+        self.signer = MexcSigner(key, secret, self.clock)
         self.leverage = leverage
-        # 由于gate默认单向持仓，故不初始化时设置
         disable_warnings(InsecureRequestWarning)
+        # ips为额外的出口IP，行情请求会分散到这些IP上
+        self.ips = [ip] + list(ips or [])
+        self.pool_size = pool_size
+        self.sessions = {source: new_session(source, pool_size) for source in self.ips}
+        self.scheduler = scheduler or default_scheduler
+        self.contracts = ContractCache(self, contract_ttl, contract_path)
+        self.metrics = metrics
+        self.retry = retry or RetryPolicy(metrics=metrics)
+        self.order_status = OrderStatus(mexc_done)
+        self.account = AccountState(self.balance_snapshot, self.position_snapshot, account_max_age)
+        if warm_up:
+            self.warm_up()
 
-    def request(self, method, url, params, query_post=False):
-        payload = "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce" \
-                  "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e"
-        query = ""
-        if method == "POST" and not query_post:
-            payload = hashlib.sha512(json.dumps(params).encode("utf-8")).hexdigest()
-        else:
-            query = urlencode(params)
-        t = str(time.time())
-        plaintext = "%s\n%s\n%s\n%s\n%s" % (method, url, query, payload, t)
-        signature = hmac.new(self.secret.encode("utf-8"), plaintext.encode("utf-8"), hashlib.sha512).hexdigest()
-        headers = {
-            "Key": self.key,
-            "Timestamp": t,
-            "SIGN": signature,
-            "Content-Type": "application/json"
-        }
+    def request(self, method, url, params):
+        headers, body = self.signer.headers(method, params)
+        session = self.sessions[self.scheduler.acquire(self.name, endpoint_kind(method, url), self.ip, self.ips)]
+        start = time.perf_counter()
+        received = 0
         try:
-            session = requests.Session()
-            session.mount("https://", SourceAddressAdapter(self.ip))
-            if method == "POST" and not query_post:
-                request = requests.Request(method, self.base + url, headers, json=params)
-            else:
-                request = requests.Request(method, self.base + url, headers, params=params)
-            prepared = session.prepare_request(request)
-            response = session.send(prepared, timeout=5, verify=False)
-            if response.status_code == 200 or response.status_code == 201:
-                return True, response.json()
+            if method == "POST":
+                response = session.request(method, self.base + url, headers=headers, data=body,
+                                           timeout=5, verify=False)
             else:
-                return False, response
+                response = session.request(method, self.base + url, headers=headers, params=params,
+                                           timeout=5, verify=False)
+            received = len(response.content)
+            result = self.parse_response(response.content)
         except Exception as error:
-            return False, error
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
 
-    def get_position(self, contract):
-        while True:
-            response = self.request("GET", f"/api/v4/futures/usdt/positions/{contract}", {})
-            if response[0]:
-                return response[1]["size"]
-            elif response[1].status_code == 400:
-                return 0
-            else:
-                print(f"gate get_position:{contract} {response[1]}")
-            time.sleep(1)
+    # 使第一次下单/取深度时复用已建立的连接
+    def warm_up(self):
+        warm_sessions(self.sessions.values(), self.base, self.pool_size, self.name)
+        self.clock.sync()
 
-    def change_leverage(self, contract):
+    def server_time(self):
+        return flow.run(self, self.server_time_steps())
+
+    def account_snapshot(self):
+        return flow.run(self, self.account_snapshot_steps())
+
+    def balance_snapshot(self):
+        return flow.run(self, self.balance_snapshot_steps())
+
+    def position_snapshot(self):
+        return flow.run(self, self.position_snapshot_steps())
+
+    def get_position(self, symbol=None):
+        self.account.refresh("position")
+        return self.position_of(symbol)
+
+    def change_position_mode(self, position_mode):
+        flow.run(self, self.change_position_mode_steps(position_mode))
+
+    def change_leverage(self, symbol):
+        flow.run(self, self.change_leverage_steps(symbol))
+
+    def balance(self):
+        self.account.refresh("balance")
+        return self.account.balance("USDT")[0]
+
+    def balance_detail(self, coin):
+        self.account.refresh("balance")
+        return self.account.balance(coin)
+
+    def position_detail(self, symbol):
+        self.account.refresh("position")
+        return self.account.position(symbol)
+
+    def symbols(self):
+        return self.contracts.symbols()
+
+    def submit_order(self, symbol, price, vol, external_order_id, precition):
+        return flow.run(self, self.submit_order_steps(symbol, price, vol, external_order_id, precition))
+
+    def order_filled(self, symbol, external_order_id, params, response):
+        filled = self.settled(symbol, external_order_id, params, response)
+        if filled is not None:
+            return filled
+        order, used = self.order_status.wait(external_order_id, lambda: self.fetch_order(symbol, external_order_id))
+        return self.filled(symbol, external_order_id, params, order, used)
+
+    def order(self, symbol, price, vol, external_order_id, precition):
+        params, response = self.submit_order(symbol, price, vol, external_order_id, precition)
+        return self.order_filled(symbol, external_order_id, params, response)
+
+    # orders为[(合约, 价格, 数量, 自定义订单号, 价格精度)]，按顺序返回每个订单的(是否成功, 结果)
+    # 结果可以和order_params一起传给order_filled确认成交
+    def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return batch.dispatch(self.place_batch, params, batch.MEXC_FUTURE_ORDERS)
+
+    def place_batch(self, params):
+        return flow.run(self, self.place_batch_steps(params))
+
+    # order_ids为交易所订单号列表，按顺序返回每个订单的(是否成功, 结果)
+    def cancel_orders(self, order_ids):
+        return batch.dispatch(self.cancel_batch, order_ids, batch.MEXC_FUTURE_CANCELS)
+
+    def cancel_batch(self, order_ids):
+        return flow.run(self, self.cancel_batch_steps(order_ids))
+
+    def get_order(self, symbol, external_order_id):
+        return flow.run(self, self.get_order_steps(symbol, external_order_id))
+
+    def fetch_order(self, symbol, external_order_id):
+        return flow.run(self, self.fetch_order_steps(symbol, external_order_id))
+
+    def depth(self, symbol, limit):
+        return flow.run(self, self.depth_steps(symbol, limit))
+
+    def detail(self, symbol=None):
+        return flow.run(self, self.detail_steps(symbol))
+
+    def contract_multiplie(self, symbol):
+        return self.parse_multiplie(self.contracts.get(symbol))
+
+    def precition(self, symbol):
+        return self.parse_precition(self.contracts.get(symbol))
+
+
+class GateFutureApi:
+    base = "https://api.gateio.ws"
+    name = "GATE"
+    retryable = staticmethod(gate_retryable)
+
+    # 失败时返回原始响应对象，gate_retryable和FatalError.status要用它的状态码
+    @staticmethod
+    def parse_response(status, content, response):
+        if status == 200 or status == 201:
+            return True, decode.loads(content)
+        return False, response
+
+    def server_time_steps(self):
+        status, response = yield ("GET", "/api/v4/spot/time", {}), None
+        return response["server_time"] / 1000 if status else None
+
+    # 余额快照：{币种: (可用, 挂单占用)}
+    def balance_snapshot_steps(self):
+        account = yield ("GET", "/api/v4/futures/usdt/accounts", {}), "gate balance"
+        return {account["currency"]: (float(account["available"]), float(account["order_margin"]))}
+
+    # 持仓快照：{合约: 带方向的持仓量}
+    def position_snapshot_steps(self):
+        positions = yield ("GET", "/api/v4/futures/usdt/positions", {}), "gate get_position"
+        return {position["contract"]: position["size"] for position in positions if position["size"]}
+
+    # 账户快照：({币种: (可用, 挂单占用)}, {合约: 带方向的持仓量})
+    def account_snapshot_steps(self):
+        return (yield from self.balance_snapshot_steps()), (yield from self.position_snapshot_steps())
+
+    def change_leverage_steps(self, contract):
         params = {
             "leverage": "0",
             "cross_leverage_limit": str(self.leverage)
         }
-        while True:
-            response = self.request("POST", f"/api/v4/futures/usdt/positions/{contract}/leverage", params, True)
-            if response[0]:
-                return None
-            else:
-                print(f"gate change_leverage: {response[1]}")
-            time.sleep(1)
-
-    def balance(self):
-        while True:
-            response = self.request("GET", "/api/v4/futures/usdt/accounts", {})
-            if response[0]:
-                return float(response[1]["available"])
-            else:
-                print(f"gate balance: {response[1]}")
-            time.sleep(1)
+        url = f"/api/v4/futures/usdt/positions/{contract}/leverage"
+        yield ("POST", url, params, True), "gate change_leverage"
 
-    def order(self, contract, price, size, text, precition):
-        params = {
+    @staticmethod
+    def order_params(contract, price, size, text, precition):
+        return {
             "contract": contract,
             "size": size,
             "price": f"{price:.{precition}}",
             "tif": "ioc",
             "text": text
         }
-        t = time.time()
-        response = self.request("POST", "/api/v4/futures/usdt/orders", params)
-        print(f"gate order(used {time.time() - t:.3f}s) : {response[1]}\n")
-        if response[0]:
+
+    def submit_order_steps(self, contract, price, size, text, precition):
+        params = self.order_params(contract, price, size, text, precition)
+        start = time.perf_counter()
+        response = yield ("POST", "/api/v4/futures/usdt/orders", params), None
+        log.result("order", response[0], venue=self.name, symbol=contract, id=text, params=params,
+                   latency=time.perf_counter() - start, response=response[1])
+        return params, response
+
+    # 不用查询订单就能确定成交量时返回成交量，否则返回None
+    def settled(self, contract, text, params, response):
+        if response[0] and gate_done(response[1]):
+            self.account.invalidate()
             return abs(response[1]["size"] - response[1]["left"])
-        else:
-            get_order_response = self.get_order(text)
-            if get_order_response:
-                return abs(get_order_response["size"] - get_order_response["left"])
-            else:
-                pprint(params)
-                return 0
+        if not response[0] and not gate_retryable(response[1]):
+            # 交易所明确拒绝，订单不存在
+            log.error("order_rejected", venue=self.name, symbol=contract, id=text, params=params)
+            return 0
+        return None
 
-    def get_order(self, text):
-        response = self.request("GET", f"/api/v4/futures/usdt/orders/{text}", {})
-        while True:
-            if response[0]:
-                return response[1]
-            else:
-                if response[1].status_code == 404:
-                    return False
-                else:
-                    print(f"gate get_order: {response[1]}")
-            time.sleep(1)
+    def filled(self, contract, text, params, order, used):
+        self.account.invalidate()
+        if order:
+            log.event("fill", venue=self.name, symbol=contract, id=text, filled=abs(order["size"] - order["left"]),
+                      latency=used)
+            return abs(order["size"] - order["left"])
+        log.error("fill_unconfirmed", venue=self.name, symbol=contract, id=text, params=params)
+        return 0
 
-    def depth(self, contract, limit):
+    def place_batch_steps(self, params):
+        start = time.perf_counter()
+        response = yield ("POST", "/api/v4/futures/usdt/batch_orders", params), None
+        self.account.invalidate()
+        log.result("batch_order", response[0], venue=self.name, ids=[order["text"] for order in params],
+                   latency=time.perf_counter() - start, response=response[1])
+        if not response[0]:
+            return batch.failed(response[1], len(params))
+        return [(order["succeeded"], order) for order in response[1]]
+
+    def cancel_batch_steps(self, order_ids):
+        params = [str(order_id) for order_id in order_ids]
+        response = yield ("POST", "/api/v4/futures/usdt/batch_cancel_orders", params), None
+        log.result("batch_cancel", response[0], venue=self.name, ids=order_ids, response=response[1])
+        if not response[0]:
+            return batch.failed(response[1], len(order_ids))
+        return [(order["succeeded"], order) for order in response[1]]
+
+    def get_order_steps(self, text):
+        try:
+            return (yield ("GET", f"/api/v4/futures/usdt/orders/{text}", {}), "gate get_order")
+        except FatalError as error:
+            if error.status == 404:
+                return False
+            raise
+
+    def fetch_order_steps(self, text):
+        response = yield ("GET", f"/api/v4/futures/usdt/orders/{text}", {}), None
+        return response[1] if response[0] else None
+
+    def depth_steps(self, contract, limit):
         params = {
             "contract": contract,
             "limit": limit
         }
-        response = self.request("GET", "/api/v4/futures/usdt/order_book", params)
+        response = yield ("GET", "/api/v4/futures/usdt/order_book", params), None
         if not response[0]:
-            print(f"gate depth: {response[1]}", end=" " * 20 + "\r")
+            log.warning("depth", venue=self.name, symbol=contract, response=response[1])
             return False
-        delay = (time.time() - response[1]["current"]) * 1000
+        delay = (self.clock.now() - response[1]["current"]) * 1000
         if delay > 120:
-            print(f"gate depth: 获取时间过长，达{delay:.2f}ms", end=" " * 20 + "\r")
+            # 获取时间过长
+            log.warning("depth_stale", venue=self.name, symbol=contract, delay=delay)
             return False
         else:
             return response[1], float(response[1]["bids"][0]["p"]), \
@@ -317,18 +485,158 @@ class GateFuture:
             parsed_depth.append([depth_by_line["p"], depth_by_line["s"]])
         return parsed_depth
 
-    def detail(self, contract=""):
+    @staticmethod
+    def order_book(depth, side):
+        return OrderBook.from_gate(depth, side)
+
+    def detail_steps(self, contract=""):
         if contract:
             contract = "/" + contract
-        response = self.request("GET", f"/api/v4/futures/usdt/contracts{contract}", {})
+        response = yield ("GET", f"/api/v4/futures/usdt/contracts{contract}", {}), None
         if response[0]:
             return response[1]
         else:
-            print(f"gate detail: {response[1]}")
+            log.error("detail", venue=self.name, response=response[1])
             return False
 
+    @staticmethod
+    def parse_detail(detail):
+        return {contract["name"]: contract for contract in detail}
+
+    @staticmethod
+    def parse_multiplie(contract):
+        return float(contract["quanto_multiplier"])
+
+    @staticmethod
+    def parse_precition(contract):
+        return -int(log10(float(contract["order_price_round"])))
+
+
+@register("GATE", "future")
+class GateFuture(GateFutureApi, FutureExchange):
+    def __init__(self, ip, key, secret, leverage, pool_size=10, warm_up=True, contract_ttl=3600,
+                 contract_path=None, retry=None, ips=None, scheduler=None, metrics=None, account_max_age=1):
+        self.ip = ip
+        self.key = key
+        self.secret = secret
+        self.clock = ClockSync(self.server_time)
+        self.signer = GateSigner(key, secret, self.clock)
+        self.leverage = leverage
+        # 由于gate默认单向持仓，故不初始化时设置
+        disable_warnings(InsecureRequestWarning)
+        # ips为额外的出口IP，行情请求会分散到这些IP上
+        self.ips = [ip] + list(ips or [])
+        self.pool_size = pool_size
+        self.sessions = {source: new_session(source, pool_size) for source in self.ips}
+        self.scheduler = scheduler or default_scheduler
+        self.contracts = ContractCache(self, contract_ttl, contract_path)
+        self.metrics = metrics
+        self.retry = retry or RetryPolicy(metrics=metrics)
+        self.order_status = OrderStatus(gate_done)
+        self.account = AccountState(self.balance_snapshot, self.position_snapshot, account_max_age)
+        if warm_up:
+            self.warm_up()
+
+    def request(self, method, url, params, query_post=False):
+        headers, query, body = self.signer.headers(method, url, params, query_post)
+        if query:
+            url += "?" + query
+        session = self.sessions[self.scheduler.acquire(self.name, endpoint_kind(method, url), self.ip, self.ips)]
+        start = time.perf_counter()
+        received = 0
+        try:
+            response = session.request(method, self.base + url, headers=headers, data=body, timeout=5, verify=False)
+            received = len(response.content)
+            result = self.parse_response(response.status_code, response.content, response)
+        except Exception as error:
+            result = False, error
+        if self.metrics is not None:
+            self.metrics.record(self.name, method, url, time.perf_counter() - start, result, len(body or b""), received)
+        return result
+
+    # 使第一次下单/取深度时复用已建立的连接
+    def warm_up(self):
+        warm_sessions(self.sessions.values(), self.base, self.pool_size, self.name)
+        self.clock.sync()
+
+    def server_time(self):
+        return flow.run(self, self.server_time_steps())
+
+    def account_snapshot(self):
+        return flow.run(self, self.account_snapshot_steps())
+
+    def balance_snapshot(self):
+        return flow.run(self, self.balance_snapshot_steps())
+
+    def position_snapshot(self):
+        return flow.run(self, self.position_snapshot_steps())
+
+    def get_position(self, contract):
+        self.account.refresh("position")
+        return self.account.position(contract)[0]
+
+    def change_leverage(self, contract):
+        flow.run(self, self.change_leverage_steps(contract))
+
+    def balance(self):
+        self.account.refresh("balance")
+        return self.account.balance("USDT")[0]
+
+    def balance_detail(self, coin):
+        self.account.refresh("balance")
+        return self.account.balance(coin)
+
+    def position_detail(self, symbol):
+        self.account.refresh("position")
+        return self.account.position(symbol)
+
+    def symbols(self):
+        return self.contracts.symbols()
+
+    def submit_order(self, contract, price, size, text, precition):
+        return flow.run(self, self.submit_order_steps(contract, price, size, text, precition))
+
+    def order_filled(self, contract, text, params, response):
+        filled = self.settled(contract, text, params, response)
+        if filled is not None:
+            return filled
+        order, used = self.order_status.wait(text, lambda: self.fetch_order(text))
+        return self.filled(contract, text, params, order, used)
+
+    def order(self, contract, price, size, text, precition):
+        params, response = self.submit_order(contract, price, size, text, precition)
+        return self.order_filled(contract, text, params, response)
+
+    # orders为[(合约, 价格, 数量, 自定义订单号, 价格精度)]，按顺序返回每个订单的(是否成功, 结果)
+    # 结果可以和order_params一起传给order_filled确认成交
+    def place_orders(self, orders):
+        params = [self.order_params(*order) for order in orders]
+        return batch.dispatch(self.place_batch, params, batch.GATE_FUTURE_ORDERS)
+
+    def place_batch(self, params):
+        return flow.run(self, self.place_batch_steps(params))
+
+    # order_ids为交易所订单号列表，按顺序返回每个订单的(是否成功, 结果)
+    def cancel_orders(self, order_ids):
+        return batch.dispatch(self.cancel_batch, order_ids, batch.GATE_FUTURE_CANCELS)
+
+    def cancel_batch(self, order_ids):
+        return flow.run(self, self.cancel_batch_steps(order_ids))
+
+    def get_order(self, text):
+        return flow.run(self, self.get_order_steps(text))
+
+    def fetch_order(self, text):
+        return flow.run(self, self.fetch_order_steps(text))
+
+    def depth(self, contract, limit):
+        return flow.run(self, self.depth_steps(contract, limit))
+
+    def detail(self, contract=""):
+        return flow.run(self, self.detail_steps(contract))
+
     def contract_multiplie(self, contract):
-        return float(self.detail(contract)["quanto_multiplier"])
+        return self.parse_multiplie(self.contracts.get(contract))
 
     def precition(self, contract):
-        return -int(log10(float(self.detail(contract)["order_price_round"])))
+        return self.parse_precition(self.contracts.get(contract))
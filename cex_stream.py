@@ -0,0 +1,440 @@
+import asyncio
+import json
+import threading
+import time
+from bisect import bisect_left, insort
+import aiohttp
+import decode
+import log
+
+
+class LocalBook:
+    def __init__(self):
+        self.bids = {}
+        self.asks = {}
+        # 价格升序排列，买一在bid_prices末尾，卖一在ask_prices开头
+        self.bid_prices = []
+        self.ask_prices = []
+        self.version = None
+        self.time = 0
+        self.synced = False
+        self.pending = []
+
+    def clear(self):
+        self.bids.clear()
+        self.asks.clear()
+        self.bid_prices.clear()
+        self.ask_prices.clear()
+        self.version = None
+        self.synced = False
+
+    def update(self, side, price, size):
+        levels, prices = (self.bids, self.bid_prices) if side == "bids" else (self.asks, self.ask_prices)
+        if size:
+            if price not in levels:
+                insort(prices, price)
+            levels[price] = size
+        elif price in levels:
+            del levels[price]
+            del prices[bisect_left(prices, price)]
+
+    def best_bid(self):
+        return self.bid_prices[-1] if self.bid_prices else None
+
+    def best_ask(self):
+        return self.ask_prices[0] if self.ask_prices else None
+
+    def levels(self, side, limit):
+        # 在其他线程读取时，价位可能刚好被删除，所以用get并跳过
+        if side == "bids":
+            lines = [[price, self.bids.get(price)] for price in reversed(self.bid_prices[-limit:])]
+        else:
+            lines = [[price, self.asks.get(price)] for price in self.ask_prices[:limit]]
+        return [line for line in lines if line[1]]
+
+
+class Stream:
+    url = None
+    ping_interval = 15
+
+    def __init__(self, client, url=None):
+        self.client = client
+        if url:
+            self.url = url
+        self.loop = None
+        self.thread = None
+        self.ws = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=asyncio.run, args=(self.run(),), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.loop and self.ws:
+            asyncio.run_coroutine_threadsafe(self.ws.close(), self.loop)
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        async with aiohttp.ClientSession() as session:
+            while self.running:
+                try:
+                    async with session.ws_connect(self.url, ssl=False, heartbeat=None) as ws:
+                        self.ws = ws
+                        await self.on_connect(ws)
+                        pinger = asyncio.create_task(self.ping(ws))
+                        try:
+                            async for message in ws:
+                                if message.type == aiohttp.WSMsgType.TEXT:
+                                    self.on_message(decode.loads(message.data))
+                                elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                    break
+                        finally:
+                            pinger.cancel()
+                except Exception as error:
+                    log.error("stream", venue=self.client.name, error=error)
+                finally:
+                    self.ws = None
+                    self.on_disconnect()
+                if self.running:
+                    await asyncio.sleep(1)
+
+    async def ping(self, ws):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            await ws.send_str(json.dumps(self.ping_message()))
+
+    async def on_connect(self, ws):
+        pass
+
+    def on_disconnect(self):
+        pass
+
+
+class DepthStream(Stream):
+    def __init__(self, client, symbols, limit=20, url=None):
+        super().__init__(client, url)
+        self.limit = limit
+        self.books = {symbol: LocalBook() for symbol in symbols}
+
+    async def on_connect(self, ws):
+        for book in self.books.values():
+            book.clear()
+            book.pending.clear()
+        for symbol in self.books:
+            await ws.send_str(json.dumps(self.subscribe_message(symbol)))
+
+    def on_disconnect(self):
+        for book in self.books.values():
+            book.synced = False
+
+    def on_update(self, symbol, first, last, update):
+        book = self.books.get(symbol)
+        if book is None:
+            return
+        if not book.synced:
+            book.pending.append((first, last, update))
+            if len(book.pending) == 1:
+                self.loop.run_in_executor(None, self.resync, symbol)
+            return
+        if last <= book.version:
+            return
+        if first > book.version + 1:
+            # 序号不连续，丢弃本地深度并用REST快照重新同步
+            book.clear()
+            book.pending.append((first, last, update))
+            self.loop.run_in_executor(None, self.resync, symbol)
+            return
+        self.apply(book, update)
+        book.version = last
+
+    def resync(self, symbol):
+        snapshot = self.snapshot(symbol)
+        self.loop.call_soon_threadsafe(self.on_snapshot, symbol, snapshot)
+
+    def on_snapshot(self, symbol, snapshot):
+        book = self.books[symbol]
+        if not snapshot:
+            book.pending.clear()
+            return
+        book.clear()
+        version, update = snapshot
+        self.apply(book, update)
+        book.version = version
+        pending, book.pending = book.pending, []
+        for i, (first, last, update) in enumerate(pending):
+            if last <= book.version:
+                continue
+            if first > book.version + 1:
+                # 快照之后仍有缺口，从缺口开始的增量全部放回pending，等下一次快照后再应用
+                book.pending.extend(pending[i:])
+                self.loop.run_in_executor(None, self.resync, symbol)
+                return
+            self.apply(book, update)
+            book.version = last
+        book.synced = True
+
+    def best(self, symbol):
+        book = self.books[symbol]
+        if not book.synced:
+            return None, None
+        return book.best_bid(), book.best_ask()
+
+
+class MexcDepthStream(DepthStream):
+    url = "wss://contract.mexc.com/edge"
+
+    @staticmethod
+    def subscribe_message(symbol):
+        return {"method": "sub.depth", "param": {"symbol": symbol}}
+
+    @staticmethod
+    def ping_message():
+        return {"method": "ping"}
+
+    def on_message(self, message):
+        if message.get("channel") != "push.depth":
+            return
+        data = message["data"]
+        data["ts"] = message.get("ts", time.time() * 1000)
+        self.on_update(message["symbol"], data["version"], data["version"], data)
+
+    @staticmethod
+    def apply(book, update):
+        for side in ("bids", "asks"):
+            for line in update.get(side, []):
+                book.update(side, line[0], line[1])
+        book.time = update.get("ts", update.get("timestamp", 0)) / 1000
+
+    def snapshot(self, symbol):
+        params = {
+            "symbol": symbol,
+            "limit": str(self.limit)
+        }
+        response = self.client.request("GET", f"/api/v1/contract/depth/{symbol}", params)
+        if not response[0]:
+            log.error("stream_snapshot", venue=self.client.name, symbol=symbol, response=response[1])
+            return None
+        return response[1]["data"]["version"], response[1]["data"]
+
+    def depth(self, symbol, limit):
+        book = self.books[symbol]
+        if not book.synced or not book.bid_prices or not book.ask_prices:
+            return False
+        raw = {
+            "data": {
+                "bids": book.levels("bids", limit),
+                "asks": book.levels("asks", limit),
+                "version": book.version,
+                "timestamp": book.time * 1000
+            }
+        }
+        return raw, book.best_bid(), book.best_ask(), book.time
+
+
+class GateDepthStream(DepthStream):
+    url = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+
+    def subscribe_message(self, symbol):
+        return {
+            "time": int(time.time()),
+            "channel": "futures.order_book_update",
+            "event": "subscribe",
+            "payload": [symbol, "100ms", str(self.limit)]
+        }
+
+    @staticmethod
+    def ping_message():
+        return {"time": int(time.time()), "channel": "futures.ping"}
+
+    def on_message(self, message):
+        if message.get("channel") != "futures.order_book_update" or message.get("event") != "update":
+            return
+        result = message["result"]
+        self.on_update(result["s"], result["U"], result["u"], result)
+
+    @staticmethod
+    def apply(book, update):
+        for side, key in (("bids", "b"), ("asks", "a")):
+            for line in update.get(key, update.get(side, [])):
+                book.update(side, float(line["p"]), abs(line["s"]))
+        if "t" in update:
+            book.time = update["t"] / 1000
+        else:
+            book.time = update.get("current", 0)
+
+    def snapshot(self, contract):
+        params = {
+            "contract": contract,
+            "limit": self.limit,
+            "with_id": "true"
+        }
+        response = self.client.request("GET", "/api/v4/futures/usdt/order_book", params)
+        if not response[0]:
+            log.error("stream_snapshot", venue=self.client.name, symbol=contract, response=response[1])
+            return None
+        return response[1]["id"], response[1]
+
+    def depth(self, contract, limit):
+        book = self.books[contract]
+        if not book.synced or not book.bid_prices or not book.ask_prices:
+            return False
+        raw = {
+            "id": book.version,
+            "current": book.time,
+            "bids": [{"p": str(p), "s": s} for p, s in book.levels("bids", limit)],
+            "asks": [{"p": str(p), "s": s} for p, s in book.levels("asks", limit)]
+        }
+        return raw, book.best_bid(), book.best_ask(), book.time
+
+
+class OrderStream(Stream):
+    async def on_connect(self, ws):
+        for message in self.login_messages():
+            await ws.send_str(json.dumps(message))
+        self.client.order_status.streaming = True
+
+    def on_disconnect(self):
+        self.client.order_status.streaming = False
+
+
+class MexcOrderStream(OrderStream):
+    url = "wss://contract.mexc.com/edge"
+
+    def login_messages(self):
+        return [self.client.signer.ws_login()]
+
+    @staticmethod
+    def ping_message():
+        return {"method": "ping"}
+
+    def on_message(self, message):
+        if message.get("channel") == "push.personal.order":
+            order = message["data"]
+            self.client.order_status.on_order(order.get("externalOid"), order)
+
+
+class GateOrderStream(OrderStream):
+    url = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+
+    def __init__(self, client, user_id, url=None):
+        super().__init__(client, url)
+        self.user_id = user_id
+
+    def login_messages(self):
+        t = int(self.client.signer.now())
+        return [{
+            "time": t,
+            "channel": "futures.orders",
+            "event": "subscribe",
+            "payload": [str(self.user_id), "!all"],
+            "auth": self.client.signer.ws_auth("futures.orders", "subscribe", t)
+        }]
+
+    @staticmethod
+    def ping_message():
+        return {"time": int(time.time()), "channel": "futures.ping"}
+
+    def on_message(self, message):
+        if message.get("channel") == "futures.orders" and message.get("event") == "update":
+            for order in message["result"]:
+                self.client.order_status.on_order(order.get("text"), order)
+
+
+class AccountStream(Stream):
+    async def on_connect(self, ws):
+        for message in self.login_messages():
+            await ws.send_str(json.dumps(message))
+        # 断线期间可能漏掉推送，先用REST对账再改为只用推送
+        await self.loop.run_in_executor(None, self.client.account.reconcile)
+        self.client.account.streaming = True
+
+    def on_disconnect(self):
+        self.client.account.streaming = False
+
+    def reconcile(self, part=None):
+        try:
+            self.client.account.reconcile(part)
+        except Exception as error:
+            log.error("account", venue=self.client.name, error=error)
+
+
+class MexcAccountStream(AccountStream):
+    url = "wss://contract.mexc.com/edge"
+
+    # 登录后默认推送全部私有数据
+    def login_messages(self):
+        return [self.client.signer.ws_login()]
+
+    @staticmethod
+    def ping_message():
+        return {"method": "ping"}
+
+    def on_message(self, message):
+        channel = message.get("channel")
+        if channel == "push.personal.asset":
+            asset = message["data"]
+            self.client.account.on_balance(asset["currency"], asset["availableBalance"], asset["frozenBalance"])
+        elif channel == "push.personal.position":
+            position = message["data"]
+            # state为3表示已平仓
+            size = 0 if position.get("state") == 3 else self.client.position_size(position)
+            self.client.account.on_position(position["symbol"], size)
+
+
+class GateAccountStream(AccountStream):
+    url = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+
+    def __init__(self, client, user_id, url=None):
+        super().__init__(client, url)
+        self.user_id = user_id
+
+    def login_messages(self):
+        t = int(self.client.signer.now())
+        return [{
+            "time": t,
+            "channel": channel,
+            "event": "subscribe",
+            "payload": payload,
+            "auth": self.client.signer.ws_auth(channel, "subscribe", t)
+        } for channel, payload in (("futures.balances", [str(self.user_id)]),
+                                   ("futures.positions", [str(self.user_id), "!all"]))]
+
+    @staticmethod
+    def ping_message():
+        return {"time": int(time.time()), "channel": "futures.ping"}
+
+    def on_message(self, message):
+        if message.get("event") != "update":
+            return
+        if message.get("channel") == "futures.positions":
+            for position in message["result"]:
+                self.client.account.on_position(position["contract"], position["size"])
+        elif message.get("channel") == "futures.balances":
+            # 余额推送只有总额没有可用余额，收到后在后台只对账余额
+            self.loop.run_in_executor(None, self.reconcile, "balance")
+
+
+class GateSpotAccountStream(AccountStream):
+    url = "wss://api.gateio.ws/ws/v4/"
+
+    def login_messages(self):
+        t = int(self.client.signer.now())
+        return [{
+            "time": t,
+            "channel": "spot.balances",
+            "event": "subscribe",
+            "auth": self.client.signer.ws_auth("spot.balances", "subscribe", t)
+        }]
+
+    @staticmethod
+    def ping_message():
+        return {"time": int(time.time()), "channel": "spot.ping"}
+
+    def on_message(self, message):
+        if message.get("channel") == "spot.balances" and message.get("event") == "update":
+            for balance in message["result"]:
+                self.client.account.on_balance(balance["currency"], float(balance["available"]),
+                                               float(balance["freeze"]))
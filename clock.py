@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+import log
+
+
+class ClockSync:
+    # fetch返回服务器时间(秒)，失败返回None；offset为服务器时间减本地时间
+    def __init__(self, fetch, samples=5, interval=60, window=10):
+        self.fetch = fetch
+        self.samples = samples
+        self.interval = interval
+        self.window = window
+        self.offset = 0
+        self.rtt = None
+        self.time = 0
+        self.history = []
+        self.attempted = False
+        self.lock = threading.Lock()
+        self.thread = None
+        self.running = False
+
+    def now(self):
+        return time.time() + self.offset
+
+    def one_way(self):
+        return self.rtt / 2 if self.rtt is not None else None
+
+    def update(self, measurements):
+        # 类似NTP，往返时间越短的样本offset误差越小，只取最近几轮里rtt最小的一个
+        if not measurements:
+            return False
+        self.history.append(min(measurements))
+        self.history = self.history[-self.window:]
+        self.rtt, self.offset = min(self.history)
+        self.time = time.time()
+        return True
+
+    # 第一次签名前校准一次；先置attempted，校准自己发的server_time请求不会再进来
+    # 失败时沿用本地时间，不在之后每个请求上重试
+    def ensure(self):
+        if self.attempted or self.time:
+            return
+        with self.lock:
+            if self.attempted or self.time:
+                return
+            self.attempted = True
+            try:
+                self.sync()
+            except Exception as error:
+                log.error("clock_sync", error=error)
+
+    def sync(self):
+        measurements = []
+        for _ in range(self.samples):
+            start = time.time()
+            server = self.fetch()
+            end = time.time()
+            if server is not None:
+                measurements.append((end - start, server - (start + end) / 2))
+        return self.update(measurements)
+
+    async def sync_async(self):
+        measurements = []
+        for _ in range(self.samples):
+            start = time.time()
+            server = await self.fetch()
+            end = time.time()
+            if server is not None:
+                measurements.append((end - start, server - (start + end) / 2))
+        return self.update(measurements)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            try:
+                self.sync()
+            except Exception as error:
+                log.error("clock_sync", error=error)
+            time.sleep(self.interval)
+
+    async def run_async(self):
+        while True:
+            try:
+                await self.sync_async()
+            except Exception as error:
+                log.error("clock_sync", error=error)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,19 @@
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+decoder = orjson.loads if orjson is not None else json.loads
+
+
+# 可以换成其他兼容json.loads的解码器，例如ujson.loads
+def use(new_decoder):
+    global decoder
+    decoder = new_decoder
+
+
+def loads(raw):
+    return decoder(raw)
+
@@ -0,0 +1,255 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import log
+
+# (交易所, "spot"/"future") -> 客户端类
+registry = {}
+
+
+def register(venue, kind):
+    def decorator(cls):
+        registry[(venue, kind)] = cls
+        cls.kind = kind
+        return cls
+    return decorator
+
+
+def create(venue, kind, *args, **kwargs):
+    return registry[(venue, kind)](*args, **kwargs)
+
+
+def venues(kind):
+    return [venue for venue, registered_kind in registry if registered_kind == kind]
+
+
+# 同一交易所的现货和合约客户端结果不能互相覆盖，键里带上类型
+def key(client, symbol):
+    return client.name, getattr(client, "kind", None), symbol
+
+
+class Quote:
+    __slots__ = ("venue", "symbol", "bid", "ask", "time", "raw")
+
+    # bid/ask为float，time为服务器时间(秒)，raw为交易所原始深度，可传给parse_depth/order_book
+    def __init__(self, venue, symbol, bid, ask, time, raw=None):
+        self.venue = venue
+        self.symbol = symbol
+        self.bid = bid
+        self.ask = ask
+        self.time = time
+        self.raw = raw
+
+    def mid(self):
+        return (self.bid + self.ask) / 2
+
+    def __repr__(self):
+        return f"<Quote {self.venue} {self.symbol} {self.bid}/{self.ask} @{self.time:.3f}>"
+
+
+class Position:
+    __slots__ = ("venue", "symbol", "size", "multiplier", "age")
+
+    # size为带方向的合约张数，多为正空为负
+    def __init__(self, venue, symbol, size, multiplier, age):
+        self.venue = venue
+        self.symbol = symbol
+        self.size = size
+        self.multiplier = multiplier
+        self.age = age
+
+    # 换算成币的数量
+    def amount(self):
+        return self.size * self.multiplier
+
+    def __repr__(self):
+        return f"<Position {self.venue} {self.symbol} {self.size}>"
+
+
+class Balance:
+    __slots__ = ("venue", "coin", "available", "frozen", "age")
+
+    def __init__(self, venue, coin, available, frozen, age):
+        self.venue = venue
+        self.coin = coin
+        self.available = available
+        self.frozen = frozen
+        self.age = age
+
+    def total(self):
+        return self.available + self.frozen
+
+    def __repr__(self):
+        return f"<Balance {self.venue} {self.coin} {self.available}+{self.frozen}>"
+
+
+class OrderResult:
+    __slots__ = ("venue", "symbol", "client_id", "size", "ok", "filled")
+
+    # 现货下单接口不返回成交量，filled为None
+    def __init__(self, venue, symbol, client_id, size, ok, filled=None):
+        self.venue = venue
+        self.symbol = symbol
+        self.client_id = client_id
+        self.size = size
+        self.ok = ok
+        self.filled = filled
+
+    def __repr__(self):
+        return f"<OrderResult {self.venue} {self.symbol} {self.client_id} {self.filled}/{self.size}>"
+
+
+# 统一接口只依赖下面的抽象方法，新交易所实现这些方法后策略代码不用改
+class SpotExchange(ABC):
+    name = None
+    kind = "spot"
+
+    @abstractmethod
+    def buy(self, symbol, price, quantity):
+        pass
+
+    @abstractmethod
+    def sell(self, symbol, price, quantity):
+        pass
+
+    @abstractmethod
+    def cancel(self, symbol):
+        pass
+
+    @abstractmethod
+    def price(self, symbol):
+        pass
+
+    @abstractmethod
+    def balance(self, coin, include_frozen=False):
+        pass
+
+    @abstractmethod
+    def amount(self, symbol, side):
+        pass
+
+    # 返回(可用, 冻结, 状态已有多少秒未更新)
+    @abstractmethod
+    def balance_detail(self, coin):
+        pass
+
+    def last(self, symbol):
+        price = self.price(symbol)
+        return float(price) if price is not None else None
+
+    def wallet(self, coin):
+        available, frozen, age = self.balance_detail(coin)
+        return Balance(self.name, coin, float(available), float(frozen), age)
+
+    def available(self, coin, include_frozen=False):
+        wallet = self.wallet(coin)
+        return wallet.total() if include_frozen else wallet.available
+
+    def place(self, symbol, side, price, quantity):
+        ok = self.buy(symbol, price, quantity) if side == "buy" else self.sell(symbol, price, quantity)
+        return OrderResult(self.name, symbol, None, quantity, ok)
+
+
+class FutureExchange(ABC):
+    name = None
+    kind = "future"
+
+    @abstractmethod
+    def depth(self, symbol, limit):
+        pass
+
+    @abstractmethod
+    def get_position(self, symbol):
+        pass
+
+    @abstractmethod
+    def balance(self):
+        pass
+
+    @abstractmethod
+    def order(self, symbol, price, size, client_id, precition):
+        pass
+
+    @abstractmethod
+    def contract_multiplie(self, symbol):
+        pass
+
+    @abstractmethod
+    def precition(self, symbol):
+        pass
+
+    # 全部可交易合约名
+    @abstractmethod
+    def symbols(self):
+        pass
+
+    # depth为depth()返回的原始深度，side为"bids"/"asks"，返回[(价格, 数量)]
+    @abstractmethod
+    def parse_depth(self, depth, side):
+        pass
+
+    # 同parse_depth，返回OrderBook
+    @abstractmethod
+    def order_book(self, depth, side):
+        pass
+
+    # 返回(可用, 冻结, 状态已有多少秒未更新)
+    @abstractmethod
+    def balance_detail(self, coin):
+        pass
+
+    # 返回(带方向的持仓量, 状态已有多少秒未更新)
+    @abstractmethod
+    def position_detail(self, symbol):
+        pass
+
+    def quote(self, symbol, limit=5):
+        depth = self.depth(symbol, limit)
+        if not depth:
+            return None
+        raw, bid, ask, t = depth
+        return Quote(self.name, symbol, float(bid), float(ask), float(t), raw)
+
+    def position(self, symbol):
+        size, age = self.position_detail(symbol)
+        return Position(self.name, symbol, float(size), self.multiplier(symbol), age)
+
+    def wallet(self, coin="USDT"):
+        available, frozen, age = self.balance_detail(coin)
+        return Balance(self.name, coin, float(available), float(frozen), age)
+
+    def multiplier(self, symbol):
+        return float(self.contract_multiplie(symbol))
+
+    def place(self, symbol, price, size, client_id, precision=None):
+        if precision is None:
+            precision = self.precition(symbol)
+        filled = self.order(symbol, price, size, client_id, precision)
+        return OrderResult(self.name, symbol, client_id, size, bool(filled), float(filled))
+
+
+class FanOut:
+    def __init__(self, workers=8):
+        self.pool = ThreadPoolExecutor(workers)
+
+    # 对每个(客户端, 交易对)并行调用fn，返回{(交易所, 类型, 交易对): 结果}，出错的结果为None
+    def map(self, fn, clients, symbols):
+        futures = {key(client, symbol): self.pool.submit(fn, client, symbol)
+                   for client in clients for symbol in symbols}
+        results = {}
+        for result_key, future in futures.items():
+            try:
+                results[result_key] = future.result()
+            except Exception as error:
+                venue, kind, symbol = result_key
+                log.error("fan_out", venue=venue, kind=kind, symbol=symbol, error=error)
+                results[result_key] = None
+        return results
+
+    def quotes(self, clients, symbols, limit=5):
+        return self.map(lambda client, symbol: client.quote(symbol, limit), clients, symbols)
+
+    def positions(self, clients, symbols):
+        return self.map(lambda client, symbol: client.position(symbol), clients, symbols)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,119 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Leg:
+    def __init__(self, client, symbol, price, size, client_id, precition):
+        self.client = client
+        self.symbol = symbol
+        self.price = price
+        self.size = size
+        self.client_id = client_id
+        self.precition = precition
+
+
+class LegResult:
+    def __init__(self, leg):
+        self.venue = leg.client.name
+        self.symbol = leg.symbol
+        self.client_id = leg.client_id
+        self.size = leg.size
+        self.filled = 0
+        self.submitted = False
+        self.error = None
+        # sent/acked为绝对时间戳，latency均为秒
+        self.sent = 0
+        self.acked = 0
+        self.submit_latency = 0
+        self.fill_latency = 0
+
+    def as_dict(self):
+        return {
+            "venue": self.venue,
+            "symbol": self.symbol,
+            "client_id": self.client_id,
+            "size": self.size,
+            "filled": self.filled,
+            "submitted": self.submitted,
+            "error": self.error,
+            "submit_latency": self.submit_latency,
+            "fill_latency": self.fill_latency
+        }
+
+
+class ExecutionResult:
+    def __init__(self, legs):
+        self.legs = legs
+        # 各腿下单请求返回时间的最大差值，即第二条腿比第一条晚到多久
+        acked = [leg.acked for leg in legs if leg.acked]
+        self.skew = max(acked) - min(acked) if acked else 0
+        self.total_latency = max(leg.submit_latency + leg.fill_latency for leg in legs) if legs else 0
+
+    def filled(self):
+        return [leg.filled for leg in self.legs]
+
+    def as_dict(self):
+        return {
+            "legs": [leg.as_dict() for leg in self.legs],
+            "skew": self.skew,
+            "total_latency": self.total_latency
+        }
+
+    def __repr__(self):
+        legs = ", ".join(f"{leg.venue} {leg.symbol} filled {leg.filled}/{leg.size} "
+                         f"submit {leg.submit_latency * 1000:.1f}ms fill {leg.fill_latency * 1000:.1f}ms"
+                         for leg in self.legs)
+        return f"<ExecutionResult {legs}, skew {self.skew * 1000:.1f}ms>"
+
+
+class Executor:
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(workers)
+
+    @staticmethod
+    def run_leg(leg):
+        result = LegResult(leg)
+        try:
+            result.sent = time.time()
+            start = time.perf_counter()
+            params, response = leg.client.submit_order(leg.symbol, leg.price, leg.size, leg.client_id,
+                                                       leg.precition)
+            acked = time.perf_counter()
+            result.acked = result.sent + acked - start
+            result.submit_latency = acked - start
+            result.submitted = response[0]
+            result.filled = leg.client.order_filled(leg.symbol, leg.client_id, params, response)
+            result.fill_latency = time.perf_counter() - acked
+        except Exception as error:
+            result.error = error
+        return result
+
+    def execute(self, *legs):
+        futures = [self.pool.submit(self.run_leg, leg) for leg in legs]
+        return ExecutionResult([future.result() for future in futures])
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+
+async def run_leg_async(leg):
+    result = LegResult(leg)
+    try:
+        result.sent = time.time()
+        start = time.perf_counter()
+        params, response = await leg.client.submit_order(leg.symbol, leg.price, leg.size, leg.client_id,
+                                                         leg.precition)
+        acked = time.perf_counter()
+        result.acked = result.sent + acked - start
+        result.submit_latency = acked - start
+        result.submitted = response[0]
+        result.filled = await leg.client.order_filled(leg.symbol, leg.client_id, params, response)
+        result.fill_latency = time.perf_counter() - acked
+    except Exception as error:
+        result.error = error
+    return result
+
+
+async def execute_async(*legs):
+    return ExecutionResult(list(await asyncio.gather(*[run_leg_async(leg) for leg in legs])))
@@ -0,0 +1,44 @@
+from retry import RetryError
+
+
+# 请求流程写成生成器，同步和异步客户端共用同一份参数构造、分页和解析逻辑，这里只负责发请求
+# 每一步yield (request的参数, 重试名)：重试名为None时只请求一次，得到(是否成功, 结果)；
+# 否则按client.retry重试，得到结果，重试失败的RetryError/FatalError会抛回生成器里；生成器的返回值即流程结果
+def run(client, steps):
+    response = error = None
+    while True:
+        try:
+            call = steps.throw(error) if error else steps.send(response)
+        except StopIteration as stop:
+            return stop.value
+        response = error = None
+        try:
+            response = send(client, *call)
+        except RetryError as caught:
+            error = caught
+
+
+def send(client, args, name):
+    if name is None:
+        return client.request(*args)
+    return client.retry.call(client.request, *args, name=name, retryable=client.retryable)
+
+
+async def run_async(client, steps):
+    response = error = None
+    while True:
+        try:
+            call = steps.throw(error) if error else steps.send(response)
+        except StopIteration as stop:
+            return stop.value
+        response = error = None
+        try:
+            response = await send_async(client, *call)
+        except RetryError as caught:
+            error = caught
+
+
+async def send_async(client, args, name):
+    if name is None:
+        return await client.request(*args)
+    return await client.retry.acall(client.request, *args, name=name, retryable=client.retryable)
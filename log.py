@@ -0,0 +1,84 @@
+import atexit
+import json
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+logger = logging.getLogger("cex")
+logger.propagate = False
+# 没有调用setup时，第一次有WARNING及以上的事件再装默认的stderr输出；避免logging的lastResort同步写stderr
+logger.addHandler(logging.NullHandler())
+listener = None
+lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        line = {"time": record.created, "level": record.levelname, "event": record.getMessage()}
+        line.update(getattr(record, "fields", {}))
+        # 响应里可能有异常、aiohttp响应等对象，统一转成字符串
+        return json.dumps(line, ensure_ascii=False, default=repr)
+
+
+# 下单线程只把记录放进无界队列，序列化和写文件都在后台线程完成
+def setup(path="cex.log", max_bytes=50 * 1024 * 1024, backup_count=5, level=logging.INFO, console=False):
+    handlers = [RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")]
+    if console:
+        handlers.append(logging.StreamHandler(sys.stdout))
+    with lock:
+        stop()
+        return start(handlers, level)
+
+
+# 没有调用setup时的默认输出：WARNING及以上写stderr，同样经过队列
+def default():
+    with lock:
+        if listener is None:
+            start([logging.StreamHandler(sys.stderr)], logging.WARNING)
+
+
+def start(handlers, level):
+    global listener
+    for handler in handlers:
+        handler.setFormatter(JsonFormatter())
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers)
+    listener.start()
+    logger.handlers = [QueueHandler(records)]
+    logger.setLevel(level)
+    return listener
+
+
+def stop():
+    global listener
+    if listener is not None:
+        # 会先写完队列里剩余的记录
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = None
+
+
+def event(name, level=logging.INFO, **fields):
+    if logger.isEnabledFor(level):
+        if listener is None:
+            default()
+        logger.log(level, name, extra={"fields": fields})
+
+
+def warning(name, **fields):
+    event(name, logging.WARNING, **fields)
+
+
+def error(name, **fields):
+    event(name, logging.ERROR, **fields)
+
+
+# 成功记INFO，失败记ERROR
+def result(name, ok, **fields):
+    event(name, logging.INFO if ok else logging.ERROR, ok=ok, **fields)
+
+
+atexit.register(stop)
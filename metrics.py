@@ -0,0 +1,154 @@
+import re
+import threading
+import time
+from collections import Counter
+
+# 直方图以微秒为单位，每个2的幂区间再细分SUB_BUCKETS份，相对误差约3%
+SUB_BUCKETS = 32
+VERSION = re.compile(r"v\d+")
+SYMBOL = re.compile(r"[A-Z0-9]+_[A-Z0-9]+")
+
+
+def is_identifier(segment):
+    if VERSION.fullmatch(segment):
+        return False
+    return any(c.isdigit() for c in segment) or bool(SYMBOL.fullmatch(segment)) or segment.startswith("t-")
+
+
+def endpoint_name(url):
+    # 去掉查询串，并把路径中的交易对、订单号替换成{}，避免标签数量无限增长
+    return "/".join("{}" if is_identifier(segment) else segment for segment in url.split("?")[0].split("/"))
+
+
+def error_code(response):
+    if isinstance(response, Exception):
+        return type(response).__name__
+    status = getattr(response, "status_code", getattr(response, "status", None))
+    if status is not None:
+        return str(status)
+    if isinstance(response, dict) or hasattr(response, "code"):
+        try:
+            return str(response["code"])
+        except (KeyError, TypeError):
+            pass
+    return "error"
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = Counter()
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def bucket(micros):
+        if micros < SUB_BUCKETS:
+            return micros
+        shift = micros.bit_length() - SUB_BUCKETS.bit_length()
+        return (shift + 1) * SUB_BUCKETS + (micros >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def upper(bucket):
+        if bucket < SUB_BUCKETS:
+            return bucket
+        shift = bucket // SUB_BUCKETS - 1
+        return ((bucket % SUB_BUCKETS + SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, seconds):
+        micros = int(seconds * 1e6)
+        self.counts[self.bucket(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, p):
+        if not self.count:
+            return 0
+        rank = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return min(self.upper(bucket) / 1e6, self.max)
+        return self.max
+
+
+class Metrics:
+    def __init__(self):
+        self.latency = {}
+        self.errors = Counter()
+        self.retries = Counter()
+        self.sent = Counter()
+        self.received = Counter()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def record(self, venue, method, url, seconds, result, sent=0, received=0):
+        key = (venue, method, endpoint_name(url))
+        with self.lock:
+            if key not in self.latency:
+                self.latency[key] = Histogram()
+            self.latency[key].record(seconds)
+            self.sent[key] += sent
+            self.received[key] += received
+            if not result[0]:
+                self.errors[key + (error_code(result[1]),)] += 1
+
+    def retry(self, name):
+        with self.lock:
+            self.retries[name] += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "latency": {
+                    key: {
+                        "count": histogram.count,
+                        "mean": histogram.total / histogram.count,
+                        "p50": histogram.percentile(50),
+                        "p99": histogram.percentile(99),
+                        "p999": histogram.percentile(99.9),
+                        "max": histogram.max
+                    } for key, histogram in self.latency.items()
+                },
+                "errors": dict(self.errors),
+                "retries": dict(self.retries),
+                "sent": dict(self.sent),
+                "received": dict(self.received)
+            }
+
+    def prometheus(self):
+        lines = ["# TYPE cex_request_seconds summary"]
+        with self.lock:
+            for (venue, method, endpoint), histogram in self.latency.items():
+                labels = f'venue="{venue}",method="{method}",endpoint="{endpoint}"'
+                for quantile in (0.5, 0.99, 0.999):
+                    lines.append(f'cex_request_seconds{{{labels},quantile="{quantile}"}} '
+                                 f'{histogram.percentile(quantile * 100):.6f}')
+                lines.append(f"cex_request_seconds_sum{{{labels}}} {histogram.total:.6f}")
+                lines.append(f"cex_request_seconds_count{{{labels}}} {histogram.count}")
+            lines.append("# TYPE cex_request_errors_total counter")
+            for (venue, method, endpoint, code), count in self.errors.items():
+                lines.append(f'cex_request_errors_total{{venue="{venue}",method="{method}",endpoint="{endpoint}",'
+                             f'code="{code}"}} {count}')
+            lines.append("# TYPE cex_request_retries_total counter")
+            for name, count in self.retries.items():
+                lines.append(f'cex_request_retries_total{{name="{name}"}} {count}')
+            for metric, counter in (("cex_sent_bytes_total", self.sent), ("cex_received_bytes_total", self.received)):
+                lines.append(f"# TYPE {metric} counter")
+                for (venue, method, endpoint), count in counter.items():
+                    lines.append(f'{metric}{{venue="{venue}",method="{method}",endpoint="{endpoint}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    # 定期把快照交给callback，例如写日志或推送到监控
+    def report(self, callback, interval=60):
+        def run():
+            while True:
+                time.sleep(interval)
+                callback(self.snapshot())
+        self.thread = threading.Thread(target=run, daemon=True)
+        self.thread.start()
@@ -0,0 +1,436 @@
+import hashlib
+import hmac
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import re
+import ssl
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+from scheduler import TokenBucket, endpoint_kind
+from sign import mexc_query
+
+
+def venue_of(path):
+    return "GATE" if path.startswith("/api/v4/") else "MEXC"
+
+
+def mexc(data, code=None):
+    # mexc合约成功code为0，现货v2为200
+    return 200, {"success": True, "code": code if code is not None else 0, "data": data}
+
+
+class MockExchange:
+    # 本地模拟mexc/gate的REST接口：校验签名，可注入延迟、错误、限频，回放录制的响应
+    def __init__(self, key="key", secret="secret", host="127.0.0.1", port=0, latency=0, jitter=0, error_rate=0,
+                 rate=None, price=100, upstream=None, record_path=None, history=10000, certfile=None, keyfile=None):
+        self.key = key
+        self.secret = secret.encode("utf-8")
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        # rate为(每秒速率, 突发容量)，超出时按各交易所的格式返回限频错误
+        self.buckets = {venue: TokenBucket(*rate) for venue in ("MEXC", "GATE")} if rate else {}
+        self.price = price
+        # upstream为{"MEXC": 真实base, ...}，没有回放数据的请求转发给真实交易所
+        self.upstream = upstream or {}
+        self.record_path = record_path
+        self.replays = {}
+        self.replayed = {}
+        self.routes = []
+        self.orders = {}
+        # 成交后的持仓，(交易所, 合约) -> 带方向的张数
+        self.positions = {}
+        self.ids = itertools.count(1)
+        # 最近history个请求的(方法, 路径)，压测时传0不记录
+        self.requests = deque(maxlen=history)
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), type("Handler", (MockHandler,), {"exchange": self}))
+        # 给了证书就走https，压测时连接建立的开销和真实交易所一致
+        self.tls = bool(certfile)
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            # 握手推迟到处理请求的线程里，不阻塞accept
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True,
+                                                     do_handshake_on_connect=False)
+        self.thread = None
+        self.default_routes()
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"{'https' if self.tls else 'http'}://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    # 注册或覆盖接口，handler(match, params, body)返回(状态码, json)
+    def route(self, method, pattern):
+        def decorator(handler):
+            self.routes.insert(0, (method, re.compile(pattern), handler))
+            return handler
+        return decorator
+
+    # 每行一条{"method", "path", "status", "body"}，同一接口的多条记录按顺序循环回放
+    def load(self, path):
+        with open(path) as file:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    self.replays.setdefault((record["method"], record["path"]), []).append(record)
+
+    def record(self, method, path, status, body):
+        if not self.record_path:
+            return
+        with self.lock:
+            with open(self.record_path, "a") as file:
+                file.write(json.dumps({"method": method, "path": path, "status": status, "body": body}) + "\n")
+
+    def verify(self, method, path, query, headers, body):
+        if venue_of(path) == "GATE":
+            payload = hashlib.sha512(body).hexdigest()
+            plaintext = "%s\n%s\n%s\n%s\n%s" % (method, path, query, payload, headers.get("Timestamp", ""))
+            expected = hmac.new(self.secret, plaintext.encode("utf-8"), hashlib.sha512).hexdigest()
+            return headers.get("KEY") == self.key and hmac.compare_digest(expected, headers.get("SIGN", ""))
+        if method == "POST":
+            signed = body
+        else:
+            signed = mexc_query(parse_qsl(query, keep_blank_values=True)).encode("utf-8")
+        plaintext = self.key.encode("utf-8") + headers.get("Request-Time", "").encode("utf-8") + signed
+        expected = hmac.new(self.secret, plaintext, hashlib.sha256).hexdigest()
+        return headers.get("ApiKey") == self.key and hmac.compare_digest(expected, headers.get("Signature", ""))
+
+    def handle(self, method, path, query, headers, body):
+        self.requests.append((method, path))
+        if method == "HEAD":
+            # 预热连接用
+            return 200, None
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+        venue = venue_of(path)
+        bucket = self.buckets.get(venue)
+        if bucket:
+            with self.lock:
+                bucket.refill(time.monotonic())
+                limited = bucket.wait_time() > 0
+                if not limited:
+                    bucket.tokens -= 1
+            if limited:
+                if venue == "GATE":
+                    return 429, {"label": "TOO_MANY_REQUESTS", "message": "rate limited"}
+                return 200, {"success": False, "code": 510, "message": "rate limited"}
+        if self.error_rate and random.random() < self.error_rate:
+            if venue == "GATE":
+                return 500, {"label": "SERVER_ERROR", "message": "injected"}
+            return 200, {"success": False, "code": 500, "message": "injected"}
+        if endpoint_kind(method, path) != "public" and not self.verify(method, path, query, headers, body):
+            if venue == "GATE":
+                return 401, {"label": "INVALID_SIGNATURE", "message": "signature mismatch"}
+            return 200, {"success": False, "code": 602, "message": "signature verification failed"}
+        records = self.replays.get((method, path))
+        if records:
+            with self.lock:
+                index = self.replayed.get((method, path), 0)
+                self.replayed[(method, path)] = index + 1
+            record = records[index % len(records)]
+            return record["status"], record["body"]
+        if venue in self.upstream:
+            status, response = self.forward(venue, method, path, query, headers, body)
+        else:
+            status, response = self.dispatch(method, path, query, body)
+        self.record(method, path, status, response)
+        return status, response
+
+    def forward(self, venue, method, path, query, headers, body):
+        url = self.upstream[venue] + path + ("?" + query if query else "")
+        request = urllib.request.Request(url, data=body or None, headers=dict(headers), method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as error:
+            return error.code, json.loads(error.read() or b"null")
+
+    def dispatch(self, method, path, query, body):
+        params = dict(parse_qsl(query, keep_blank_values=True))
+        data = json.loads(body) if body else None
+        for route_method, pattern, handler in self.routes:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if match:
+                return handler(match, params, data)
+        return 404, {"label": "NOT_FOUND", "message": f"{method} {path}"}
+
+    def book(self, spread=0.001, levels=20):
+        bids = [round(self.price * (1 - spread * (i + 1)), 6) for i in range(levels)]
+        asks = [round(self.price * (1 + spread * (i + 1)), 6) for i in range(levels)]
+        return bids, asks
+
+    def default_routes(self):
+        route = self.route
+
+        # mexc合约
+        @route("GET", r"/api/v1/contract/ping")
+        def mexc_ping(match, params, data):
+            return mexc(int(time.time() * 1000))
+
+        @route("GET", r"/api/v1/contract/depth/(\w+)")
+        def mexc_depth(match, params, data):
+            bids, asks = self.book(levels=int(params.get("limit", 20)))
+            return mexc({"asks": [[p, 100, 1] for p in asks], "bids": [[p, 100, 1] for p in bids],
+                         "version": next(self.ids), "timestamp": int(time.time() * 1000)})
+
+        @route("GET", r"/api/v1/contract/detail")
+        def mexc_detail(match, params, data):
+            contract = {"symbol": params.get("symbol", "BTC_USDT"), "contractSize": 0.0001, "priceScale": 1}
+            return mexc(contract if "symbol" in params else [contract])
+
+        @route("POST", r"/api/v1/private/order/submit")
+        def mexc_submit(match, params, data):
+            order_id = str(next(self.ids))
+            self.orders[data["externalOid"]] = {"orderId": order_id, "symbol": data["symbol"], "state": 3,
+                                                "dealVol": data["vol"], "externalOid": data["externalOid"]}
+            # side 1开多 2平空 3开空 4平多
+            key = ("MEXC", data["symbol"])
+            self.positions[key] = self.positions.get(key, 0) + (data["vol"] if data["side"] in (1, 2) else -data["vol"])
+            return mexc(order_id)
+
+        @route("POST", r"/api/v1/private/order/submit_batch")
+        def mexc_submit_batch(match, params, data):
+            return mexc([{"orderId": mexc_submit(match, params, order)[1]["data"], "externalOid": order["externalOid"]}
+                         for order in data])
+
+        @route("POST", r"/api/v1/private/order/cancel")
+        def mexc_cancel(match, params, data):
+            return mexc([{"orderId": order_id, "errorCode": 0} for order_id in data])
+
+        @route("GET", r"/api/v1/private/order/external/(\w+)/([\w-]+)")
+        def mexc_order(match, params, data):
+            order = self.orders.get(match.group(2))
+            if order is None:
+                return 200, {"success": False, "code": 2009, "message": "order not found"}
+            return mexc(order)
+
+        @route("GET", r"/api/v1/private/account/assets")
+        def mexc_assets(match, params, data):
+            return mexc([{"currency": "USDT", "availableBalance": 1000, "frozenBalance": 0}])
+
+        @route("GET", r"/api/v1/private/position/open_positions")
+        def mexc_positions(match, params, data):
+            return mexc([{"symbol": symbol, "holdVol": abs(size), "positionType": 1 if size > 0 else 2}
+                         for (venue, symbol), size in self.positions.items() if venue == "MEXC" and size])
+
+        @route("POST", r"/api/v1/private/position/change_(position_mode|leverage)")
+        def mexc_change(match, params, data):
+            return mexc(None)
+
+        # mexc现货v2
+        @route("GET", r"/open/api/v2/common/timestamp")
+        def mexc_spot_time(match, params, data):
+            return mexc(int(time.time() * 1000), 200)
+
+        @route("GET", r"/open/api/v2/market/ticker")
+        def mexc_spot_ticker(match, params, data):
+            return mexc([{"symbol": "BTC_USDT", "last": str(self.price)}], 200)
+
+        @route("GET", r"/open/api/v2/account/info")
+        def mexc_spot_account(match, params, data):
+            return mexc({"USDT": {"available": "1000", "frozen": "0"}}, 200)
+
+        @route("POST", r"/open/api/v2/order/place")
+        def mexc_spot_place(match, params, data):
+            return mexc(str(next(self.ids)), 200)
+
+        @route("POST", r"/open/api/v2/order/place_batch")
+        def mexc_spot_place_batch(match, params, data):
+            return mexc([{"order_id": str(next(self.ids))} for _ in data], 200)
+
+        @route("DELETE", r"/open/api/v2/order/cancel(_by_symbol)?")
+        def mexc_spot_cancel(match, params, data):
+            return mexc({order_id: "success" for order_id in params.get("order_ids", "").split(",") if order_id}, 200)
+
+        @route("GET", r"/open/api/v2/order/list")
+        def mexc_spot_orders(match, params, data):
+            return mexc([], 200)
+
+        @route("GET", r"/open/api/v2/order/open_orders")
+        def mexc_spot_open_orders(match, params, data):
+            return mexc([], 200)
+
+        # gate合约
+        @route("GET", r"/api/v4/spot/time")
+        def gate_time(match, params, data):
+            return 200, {"server_time": int(time.time() * 1000)}
+
+        @route("GET", r"/api/v4/futures/usdt/order_book")
+        def gate_order_book(match, params, data):
+            bids, asks = self.book(levels=int(params.get("limit", 20)))
+            return 200, {"id": next(self.ids), "current": time.time(), "update": time.time(),
+                         "asks": [{"p": str(p), "s": 100} for p in asks],
+                         "bids": [{"p": str(p), "s": 100} for p in bids]}
+
+        @route("GET", r"/api/v4/futures/usdt/contracts(/\w+)?")
+        def gate_contracts(match, params, data):
+            contract = {"name": (match.group(1) or "/BTC_USDT")[1:], "quanto_multiplier": "0.0001",
+                        "order_price_round": "0.1"}
+            return 200, contract if match.group(1) else [contract]
+
+        def gate_order(order):
+            text = order.get("text") or f"t-{next(self.ids)}"
+            filled = {"id": next(self.ids), "contract": order["contract"], "size": order["size"], "left": 0,
+                      "status": "finished", "finish_as": "filled", "text": text, "succeeded": True}
+            self.orders[text] = filled
+            key = ("GATE", order["contract"])
+            self.positions[key] = self.positions.get(key, 0) + order["size"]
+            return filled
+
+        @route("POST", r"/api/v4/futures/usdt/orders")
+        def gate_submit(match, params, data):
+            return 201, gate_order(data)
+
+        @route("POST", r"/api/v4/futures/usdt/batch_orders")
+        def gate_submit_batch(match, params, data):
+            return 200, [gate_order(order) for order in data]
+
+        @route("POST", r"/api/v4/futures/usdt/batch_cancel_orders")
+        def gate_cancel_batch(match, params, data):
+            return 200, [{"id": order_id, "succeeded": True} for order_id in data]
+
+        @route("GET", r"/api/v4/futures/usdt/orders/([\w-]+)")
+        def gate_get_order(match, params, data):
+            order = self.orders.get(match.group(1))
+            if order is None:
+                return 404, {"label": "ORDER_NOT_FOUND", "message": "order not found"}
+            return 200, order
+
+        @route("GET", r"/api/v4/futures/usdt/accounts")
+        def gate_accounts(match, params, data):
+            return 200, {"currency": "USDT", "available": "1000", "order_margin": "0"}
+
+        @route("GET", r"/api/v4/futures/usdt/positions")
+        def gate_positions(match, params, data):
+            return 200, [{"contract": contract, "size": size}
+                         for (venue, contract), size in self.positions.items() if venue == "GATE"]
+
+        @route("POST", r"/api/v4/futures/usdt/positions/(\w+)/leverage")
+        def gate_leverage(match, params, data):
+            return 200, {"contract": match.group(1), "leverage": params.get("leverage")}
+
+        # gate现货
+        @route("GET", r"/api/v4/spot/tickers")
+        def gate_spot_tickers(match, params, data):
+            return 200, [{"currency_pair": "BTC_USDT", "last": str(self.price)}]
+
+        @route("GET", r"/api/v4/spot/accounts")
+        def gate_spot_accounts(match, params, data):
+            return 200, [{"currency": "USDT", "available": "1000", "locked": "0"}]
+
+        @route("POST", r"/api/v4/spot/orders")
+        def gate_spot_place(match, params, data):
+            return 201, {"id": str(next(self.ids)), "status": "closed", **data}
+
+        @route("POST", r"/api/v4/spot/batch_orders")
+        def gate_spot_place_batch(match, params, data):
+            return 200, [{"id": str(next(self.ids)), "succeeded": True, **order} for order in data]
+
+        @route("POST", r"/api/v4/spot/cancel_batch_orders")
+        def gate_spot_cancel_batch(match, params, data):
+            return 200, [{"succeeded": True, **order} for order in data]
+
+        @route("DELETE", r"/api/v4/spot/orders")
+        def gate_spot_cancel(match, params, data):
+            return 200, []
+
+        @route("GET", r"/api/v4/spot/orders")
+        def gate_spot_orders(match, params, data):
+            return 200, []
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    exchange = None
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写出，不关Nagle的话keep-alive连接每个请求都要等40ms的延迟ACK
+    disable_nagle_algorithm = True
+
+    def respond(self):
+        path, _, query = self.path.partition("?")
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        status, response = self.exchange.handle(self.command, path, query, self.headers, body)
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_DELETE = do_HEAD = respond
+
+    def log_message(self, *args):
+        pass
+
+
+# 生成只在本地用的自签名证书，返回(证书路径, 私钥路径)
+def self_signed(directory, host="127.0.0.1"):
+    certfile = os.path.join(directory, "mock.crt")
+    keyfile = os.path.join(directory, "mock.key")
+    subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", f"/CN={host}",
+                    "-keyout", keyfile, "-out", certfile], check=True, capture_output=True)
+    return certfile, keyfile
+
+
+def run_process(connection, kwargs):
+    exchange = MockExchange(**kwargs)
+    connection.send(exchange.url)
+    exchange.server.serve_forever()
+
+
+class MockProcess:
+    # 在子进程里运行MockExchange，压测时服务端的CPU、GIL和内存不算在被测客户端上
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.process = None
+        self.url = None
+
+    def start(self):
+        parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_process, args=(child, self.kwargs), daemon=True)
+        self.process.start()
+        self.url = parent.recv()
+        return self.url
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
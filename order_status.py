@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+# 查询间隔逐步增加，最后一个间隔一直重复直到超过deadline
+INTERVALS = (0.005, 0.01, 0.02, 0.05, 0.1, 0.2)
+
+
+class OrderStatus:
+    def __init__(self, done, intervals=INTERVALS, deadline=3, max_orders=1000):
+        self.done = done
+        self.max_orders = max_orders
+        self.intervals = intervals
+        self.deadline = deadline
+        # 私有ws推送的订单，按自定义订单号(mexc externalOid, gate text)保存
+        self.orders = {}
+        self.events = {}
+        self.lock = threading.Lock()
+        self.streaming = False
+
+    def on_order(self, client_id, order):
+        with self.lock:
+            self.orders[client_id] = order
+            if len(self.orders) > self.max_orders:
+                # 没人等待的推送只保留最近的一部分
+                del self.orders[next(iter(self.orders))]
+            event = self.events.get(client_id)
+        if event and self.done(order):
+            event.set()
+
+    def pushed(self, client_id):
+        order = self.orders.get(client_id)
+        if order is not None and self.done(order):
+            return self.orders.pop(client_id, order)
+        return None
+
+    def schedule(self):
+        for interval in self.intervals:
+            yield interval
+        while True:
+            yield self.intervals[-1]
+
+    def wait(self, client_id, fetch):
+        # 返回(订单, 确认用时秒数)，超过deadline仍未结束时返回最后一次查到的订单
+        start = time.perf_counter()
+        if self.streaming:
+            with self.lock:
+                event = self.events.setdefault(client_id, threading.Event())
+            try:
+                order = self.pushed(client_id)
+                if order is None and event.wait(self.deadline):
+                    order = self.pushed(client_id)
+                if order is not None:
+                    return order, time.perf_counter() - start
+            finally:
+                with self.lock:
+                    self.events.pop(client_id, None)
+        order = None
+        for interval in self.schedule():
+            order = fetch() or order
+            if order is not None and self.done(order):
+                break
+            if time.perf_counter() - start + interval > self.deadline:
+                break
+            time.sleep(interval)
+        return order, time.perf_counter() - start
+
+    async def wait_async(self, client_id, fetch):
+        start = time.perf_counter()
+        order = None
+        for interval in self.schedule():
+            order = self.pushed(client_id) or await fetch() or order
+            if order is not None and self.done(order):
+                break
+            if time.perf_counter() - start + interval > self.deadline:
+                break
+            await asyncio.sleep(interval)
+        return order, time.perf_counter() - start
+
+
+# mexc订单state: 1待报 2未完成 3已完成 4已撤销 5无效
+def mexc_done(order):
+    return order.get("state") in (3, 4, 5)
+
+
+def gate_done(order):
+    return order.get("status") == "finished"
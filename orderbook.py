@@ -0,0 +1,67 @@
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from operator import mul
+
+
+class OrderBook:
+    __slots__ = ("side", "prices", "sizes", "time", "cumulative_sizes", "cumulative_notional")
+
+    # prices按盘口顺序排列，即bids从高到低、asks从低到高，下标0为最优价
+    def __init__(self, side, prices, sizes, time=0):
+        self.side = side
+        self.prices = prices if isinstance(prices, array) else array("d", prices)
+        self.sizes = sizes if isinstance(sizes, array) else array("d", sizes)
+        self.time = time
+        self.cumulative_sizes = None
+        self.cumulative_notional = None
+
+    @classmethod
+    def from_mexc(cls, depth, side):
+        lines = depth["data"][side]
+        return cls(side, array("d", [line[0] for line in lines]), array("d", [line[1] for line in lines]),
+                   depth["data"].get("timestamp", 0) / 1000)
+
+    @classmethod
+    def from_gate(cls, depth, side):
+        lines = depth[side]
+        return cls(side, array("d", [float(line["p"]) for line in lines]),
+                   array("d", [abs(line["s"]) for line in lines]), depth.get("current", 0))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def best(self):
+        return self.prices[0] if self.prices else None
+
+    def cumulative(self):
+        if self.cumulative_sizes is None:
+            self.cumulative_sizes = array("d", accumulate(self.sizes))
+            self.cumulative_notional = array("d", accumulate(map(mul, self.prices, self.sizes)))
+        return self.cumulative_sizes
+
+    def total(self):
+        cumulative = self.cumulative()
+        return cumulative[-1] if cumulative else 0
+
+    def fill(self, quantity):
+        # 吃掉quantity张需要走到的档位，返回(可成交数量, 成交额, 最差成交价)
+        cumulative = self.cumulative()
+        if not cumulative or quantity <= 0:
+            return 0, 0, None
+        i = bisect_left(cumulative, quantity)
+        if i >= len(cumulative):
+            return cumulative[-1], self.cumulative_notional[-1], self.prices[-1]
+        filled_before = cumulative[i - 1] if i else 0
+        notional_before = self.cumulative_notional[i - 1] if i else 0
+        return quantity, notional_before + (quantity - filled_before) * self.prices[i], self.prices[i]
+
+    def vwap(self, quantity):
+        filled, notional, _ = self.fill(quantity)
+        return notional / filled if filled else None
+
+    def impact(self, quantity):
+        _, _, worst = self.fill(quantity)
+        if worst is None:
+            return None
+        return abs(worst - self.prices[0]) / self.prices[0]
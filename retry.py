@@ -0,0 +1,123 @@
+import asyncio
+import json
+import random
+import time
+import log
+
+# mexc: 429/510请求频繁, 500/501/503服务端繁忙
+MEXC_RETRYABLE_CODES = {429, 500, 501, 503, 510}
+GATE_RETRYABLE_LABELS = {"TOO_MANY_REQUESTS", "SERVER_ERROR", "TOO_BUSY", "INTERNAL"}
+
+
+class RetryError(Exception):
+    def __init__(self, name, response, attempts):
+        super().__init__(f"{name}: {response} (after {attempts} attempts)")
+        self.name = name
+        self.response = response
+        self.attempts = attempts
+
+    @property
+    def status(self):
+        return getattr(self.response, "status_code", getattr(self.response, "status", None))
+
+
+# 交易所明确拒绝的请求(参数错误、不存在等)，重试没有意义
+class FatalError(RetryError):
+    pass
+
+
+def body(response):
+    if isinstance(response, (str, bytes)):
+        try:
+            return json.loads(response)
+        except ValueError:
+            return None
+    if isinstance(response, dict):
+        return response
+    return None
+
+
+def mexc_retryable(response):
+    if isinstance(response, Exception):
+        return True
+    data = body(response)
+    if data is None:
+        return True
+    return data.get("code") in MEXC_RETRYABLE_CODES
+
+
+def gate_retryable(response):
+    if isinstance(response, Exception):
+        return True
+    status = getattr(response, "status_code", getattr(response, "status", None))
+    if status is not None:
+        return status == 429 or status >= 500
+    data = body(response)
+    if data is None:
+        return True
+    return data.get("label") in GATE_RETRYABLE_LABELS
+
+
+def always_retryable(response):
+    return True
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=5, base=0.1, cap=2, deadline=10, jitter=True, metrics=None):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.deadline = deadline
+        self.jitter = jitter
+        self.metrics = metrics
+
+    def backoff(self, attempt):
+        delay = min(self.cap, self.base * 2 ** attempt)
+        return random.uniform(0, delay) if self.jitter else delay
+
+    def next_delay(self, attempt, start):
+        # 返回None表示次数或截止时间已用尽
+        if attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        if self.deadline is not None and time.monotonic() + delay - start > self.deadline:
+            return None
+        return delay
+
+    def call(self, fn, *args, name="", retryable=always_retryable):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            status, response = fn(*args)
+            if status:
+                return response
+            if not retryable(response):
+                raise FatalError(name, response, attempt + 1)
+            delay = self.next_delay(attempt, start)
+            if delay is None:
+                raise RetryError(name, response, attempt + 1)
+            # name是log.warning的第一个参数，字段名用call
+            log.warning("retry", call=name, attempt=attempt + 1, delay=delay, response=response)
+            if self.metrics is not None:
+                self.metrics.retry(name)
+            time.sleep(delay)
+            attempt += 1
+
+    async def acall(self, fn, *args, name="", retryable=always_retryable):
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            status, response = await fn(*args)
+            if status:
+                return response
+            if not retryable(response):
+                raise FatalError(name, response, attempt + 1)
+            delay = self.next_delay(attempt, start)
+            if delay is None:
+                raise RetryError(name, response, attempt + 1)
+            # name是log.warning的第一个参数，字段名用call
+            log.warning("retry", call=name, attempt=attempt + 1, delay=delay, response=response)
+            if self.metrics is not None:
+                self.metrics.retry(name)
+            await asyncio.sleep(delay)
+            attempt += 1
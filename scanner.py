@@ -0,0 +1,119 @@
+import threading
+import time
+from array import array
+from math import isnan
+from itertools import permutations
+from exchange import FanOut, key
+import log
+
+NAN = float("nan")
+
+
+class Opportunity:
+    __slots__ = ("symbol", "buy_venue", "sell_venue", "buy_price", "sell_price", "quantity", "spread", "time")
+
+    # 在buy_venue按吃单均价买入、在sell_venue卖出quantity个币，spread为扣除滑点后的相对价差
+    def __init__(self, symbol, buy_venue, sell_venue, buy_price, sell_price, quantity, spread, time):
+        self.symbol = symbol
+        self.buy_venue = buy_venue
+        self.sell_venue = sell_venue
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.quantity = quantity
+        self.spread = spread
+        self.time = time
+
+    def __repr__(self):
+        return (f"<Opportunity {self.symbol} buy {self.buy_venue}@{self.buy_price} "
+                f"sell {self.sell_venue}@{self.sell_price} {self.spread * 100:.3f}%>")
+
+
+class SpreadScanner:
+    # clients为合约客户端，notional为每笔按USDT计的目标成交额，价差按吃掉这么多深度后的均价计算
+    def __init__(self, clients, notional=100, min_spread=0, interval=1, limit=20, workers=16, symbols=None):
+        self.clients = clients
+        self.notional = notional
+        self.min_spread = min_spread
+        self.interval = interval
+        self.limit = limit
+        self.fan_out = FanOut(workers)
+        self.symbols = symbols or self.common_symbols()
+        self.multipliers = {(client.name, symbol): client.multiplier(symbol)
+                            for client in clients for symbol in self.symbols}
+        self.opportunities = []
+        self.time = 0
+        self.thread = None
+        self.running = False
+
+    # 只保留所有交易所都有的交易对
+    def common_symbols(self):
+        common = None
+        for client in self.clients:
+            symbols = set(client.symbols())
+            common = symbols if common is None else common & symbols
+        return sorted(common or ())
+
+    def vwaps(self, client, quotes, mids):
+        # 返回该交易所每个交易对吃单买入、卖出notional的均价，深度不够或没有行情时为nan
+        asks = array("d", [NAN]) * len(self.symbols)
+        bids = array("d", [NAN]) * len(self.symbols)
+        for i, symbol in enumerate(self.symbols):
+            depth = quotes.get(key(client, symbol))
+            if depth is None or isnan(mids[i]):
+                continue
+            contracts = self.notional / mids[i] / self.multipliers[(client.name, symbol)]
+            for side, column in (("asks", asks), ("bids", bids)):
+                book = client.order_book(depth.raw, side)
+                filled, notional, _ = book.fill(contracts)
+                if filled >= contracts:
+                    column[i] = notional / filled
+        return asks, bids
+
+    def scan(self):
+        quotes = self.fan_out.quotes(self.clients, self.symbols, self.limit)
+        # 用各交易所中间价的平均值把目标成交额换算成币的数量
+        mids = array("d", [NAN]) * len(self.symbols)
+        for i, symbol in enumerate(self.symbols):
+            prices = [quote.mid() for quote in (quotes.get(key(client, symbol)) for client in self.clients) if quote]
+            if prices:
+                mids[i] = sum(prices) / len(prices)
+        columns = {client.name: self.vwaps(client, quotes, mids) for client in self.clients}
+        now = time.time()
+        opportunities = []
+        for buy, sell in permutations(self.clients, 2):
+            asks = columns[buy.name][0]
+            bids = columns[sell.name][1]
+            # 对全部交易对一次算出价差，nan的比较结果为False会被过滤掉
+            spreads = array("d", map(lambda bid, ask: (bid - ask) / ask, bids, asks))
+            for i, spread in enumerate(spreads):
+                if spread > self.min_spread:
+                    opportunities.append(Opportunity(self.symbols[i], buy.name, sell.name, asks[i], bids[i],
+                                                     self.notional / mids[i], spread, now))
+        opportunities.sort(key=lambda opportunity: opportunity.spread, reverse=True)
+        self.opportunities = opportunities
+        self.time = now
+        return opportunities
+
+    # 每interval秒产出一次按价差从大到小排序的机会列表
+    def stream(self):
+        while True:
+            start = time.time()
+            yield self.scan()
+            time.sleep(max(0, self.interval - (time.time() - start)))
+
+    def start(self, callback):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, args=(callback,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self, callback):
+        while self.running:
+            start = time.time()
+            try:
+                callback(self.scan())
+            except Exception as error:
+                log.error("scanner", error=error)
+            time.sleep(max(0, self.interval - (time.time() - start)))
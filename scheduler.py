@@ -0,0 +1,124 @@
+import asyncio
+import threading
+import time
+
+# 每秒速率和突发容量；"ip"为同一出口IP在该交易所所有接口共用的总限额
+LIMITS = {
+    ("MEXC", "order"): (10, 20),
+    ("MEXC", "private"): (10, 20),
+    ("MEXC", "public"): (10, 20),
+    ("MEXC", "ip"): (20, 40),
+    ("GATE", "order"): (100, 100),
+    ("GATE", "private"): (150, 150),
+    ("GATE", "public"): (200, 200),
+    ("GATE", "ip"): (300, 300)
+}
+
+# 总限额中为更高优先级保留的比例：下单可以用完，私有查询留20%，行情轮询留40%
+RESERVE = {
+    "order": 0,
+    "private": 0.2,
+    "public": 0.4
+}
+
+PUBLIC_PATHS = ("/market/", "/common/", "/contract/depth", "/contract/detail", "/contract/ping", "order_book",
+                "/tickers", "/contracts", "/spot/time")
+
+
+def endpoint_kind(method, url):
+    if any(path in url for path in PUBLIC_PATHS):
+        return "public"
+    if method != "GET" and "order" in url:
+        return "order"
+    return "private"
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+    def wait_time(self, reserve=0):
+        # 取一个令牌前需要等待的秒数，reserve为必须留下的令牌数
+        need = 1 + reserve - self.tokens
+        return need / self.rate if need > 0 else 0
+
+
+class Scheduler:
+    def __init__(self, limits=None):
+        self.limits = dict(LIMITS)
+        if limits:
+            self.limits.update(limits)
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, venue, kind, ip):
+        key = (venue, kind, ip)
+        if key not in self.buckets:
+            self.buckets[key] = TokenBucket(*self.limits[(venue, kind)])
+        return self.buckets[key]
+
+    def try_acquire(self, venue, kind, ip):
+        # 成功返回0，否则返回需要等待的秒数
+        now = time.monotonic()
+        with self.lock:
+            endpoint = self.bucket(venue, kind, ip)
+            total = self.bucket(venue, "ip", ip)
+            endpoint.refill(now)
+            total.refill(now)
+            wait = max(endpoint.wait_time(), total.wait_time(RESERVE[kind] * total.capacity))
+            if wait == 0:
+                endpoint.tokens -= 1
+                total.tokens -= 1
+            return wait
+
+    def pick(self, venue, kind, ip, pool):
+        # 行情请求分散到剩余额度最多的出口IP上
+        if kind != "public" or not pool:
+            return ip
+        now = time.monotonic()
+        with self.lock:
+            best, best_tokens = ip, None
+            for candidate in pool:
+                bucket = self.bucket(venue, "ip", candidate)
+                bucket.refill(now)
+                if best_tokens is None or bucket.tokens > best_tokens:
+                    best, best_tokens = candidate, bucket.tokens
+            return best
+
+    def acquire(self, venue, kind, ip, pool=None):
+        ip = self.pick(venue, kind, ip, pool)
+        while True:
+            wait = self.try_acquire(venue, kind, ip)
+            if wait == 0:
+                return ip
+            time.sleep(wait)
+
+    async def acquire_async(self, venue, kind, ip, pool=None):
+        ip = self.pick(venue, kind, ip, pool)
+        while True:
+            wait = self.try_acquire(venue, kind, ip)
+            if wait == 0:
+                return ip
+            await asyncio.sleep(wait)
+
+    def headroom(self, venue=None):
+        now = time.monotonic()
+        with self.lock:
+            result = {}
+            for (bucket_venue, kind, ip), bucket in self.buckets.items():
+                if venue and bucket_venue != venue:
+                    continue
+                bucket.refill(now)
+                result[(bucket_venue, kind, ip)] = bucket.tokens / bucket.capacity
+            return result
+
+
+# 同一进程内的所有客户端默认共用一个调度器，这样同一IP的额度才能正确累计
+default_scheduler = Scheduler()
@@ -0,0 +1,306 @@
+import threading
+import time
+from multiprocessing import shared_memory, resource_tracker
+from array import array
+from exchange import FanOut
+from sizing import depth_version
+import log
+
+MAGIC = 0x43455844
+# 头部7个字: magic, 档数, 环长度, 交易对数量, 创建编号, 服务器时钟偏差, 最近一轮写入的服务器时间
+# 后面每个交易对名字占NAME_BYTES
+HEADER_WORDS = 7
+GENERATION = 4
+OFFSET = 5
+HEARTBEAT = 6
+NAME_BYTES = 32
+# 每个环节点: seq, version, time, 买档数, 卖档数, 然后买卖各levels档的(价格, 数量)
+ENTRY_WORDS = 5
+
+
+def segment(venue, name="depth"):
+    return f"cex_{name}_{venue.lower()}"
+
+
+class SharedBook:
+    # symbols为None时连接已有的共享内存，否则按symbols创建
+    def __init__(self, name, symbols=None, levels=20, ring=4):
+        self.owner = symbols is not None
+        if self.owner:
+            # 名字超长会写进下一个交易对的名字里
+            for symbol in symbols:
+                if len(symbol.encode()) > NAME_BYTES:
+                    raise ValueError(f"symbol {symbol} longer than {NAME_BYTES} bytes")
+            region_words = 1 + ring * (ENTRY_WORDS + 4 * levels)
+            size = (HEADER_WORDS + len(symbols) * (NAME_BYTES // 8 + region_words)) * 8
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+            self.words = self.shm.buf.cast("Q")
+            for i, symbol in enumerate(symbols):
+                encoded = symbol.encode()
+                offset = HEADER_WORDS * 8 + i * NAME_BYTES
+                self.shm.buf[offset:offset + len(encoded)] = encoded
+            self.words[1], self.words[2], self.words[3] = levels, ring, len(symbols)
+            # 守护进程重启后同名共享内存是新建的，读进程用创建编号判断是否需要重新连接
+            self.words[GENERATION] = time.time_ns()
+            self.words[0] = MAGIC
+        else:
+            self.shm = shared_memory.SharedMemory(name)
+            # 读进程退出时resource_tracker会删掉共享内存，只有创建者负责删除
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+            self.words = self.shm.buf.cast("Q")
+            if self.words[0] != MAGIC:
+                self.release()
+                raise ValueError(f"shared depth {name} not ready")
+            levels, ring = self.words[1], self.words[2]
+            symbols = []
+            for i in range(self.words[3]):
+                offset = HEADER_WORDS * 8 + i * NAME_BYTES
+                symbols.append(bytes(self.shm.buf[offset:offset + NAME_BYTES]).rstrip(b"\0").decode())
+        self.floats = self.shm.buf.cast("d")
+        self.levels = levels
+        self.ring = ring
+        self.symbols = symbols
+        self.entry_words = ENTRY_WORDS + 4 * levels
+        self.region_words = 1 + ring * self.entry_words
+        start = HEADER_WORDS + len(symbols) * NAME_BYTES // 8
+        self.regions = {symbol: start + i * self.region_words for i, symbol in enumerate(symbols)}
+
+    def generation(self):
+        return self.words[GENERATION]
+
+    def alive(self):
+        return self.words[0] == MAGIC
+
+    def head(self, symbol):
+        return self.words[self.regions[symbol]]
+
+    # 守护进程每轮写入自己的时钟偏差，读进程不请求交易所也能用服务器时间判断深度是否过期
+    def beat(self, offset):
+        self.floats[OFFSET] = offset
+        self.floats[HEARTBEAT] = time.time() + offset
+
+    def offset(self):
+        return self.floats[OFFSET]
+
+    def heartbeat(self):
+        return self.floats[HEARTBEAT]
+
+    # 写到环里的下一个节点，seq为奇数表示正在写，写完后再推进head
+    def write(self, symbol, version, t, bids, asks):
+        region = self.regions[symbol]
+        head = self.words[region]
+        entry = region + 1 + (head + 1) % self.ring * self.entry_words
+        seq = self.words[entry]
+        self.words[entry] = seq + 1
+        bids = bids[:self.levels]
+        asks = asks[:self.levels]
+        self.floats[entry + 1] = version
+        self.floats[entry + 2] = t
+        self.words[entry + 3] = len(bids)
+        self.words[entry + 4] = len(asks)
+        start = entry + ENTRY_WORDS
+        for offset, lines in ((start, bids), (start + 2 * self.levels, asks)):
+            flat = array("d", [value for line in lines for value in (float(line[0]), abs(float(line[1])))])
+            self.floats[offset:offset + len(flat)] = flat
+        self.words[entry] = seq + 2
+        self.words[region] = head + 1
+
+    # 返回(version, time, bids, asks)，读的过程中被覆盖就重读，还没有数据时返回None
+    def read(self, symbol, limit, retries=100):
+        region = self.regions.get(symbol)
+        if region is None:
+            return None
+        for _ in range(retries):
+            head = self.words[region]
+            if not head:
+                return None
+            entry = region + 1 + head % self.ring * self.entry_words
+            seq = self.words[entry]
+            if seq & 1:
+                continue
+            version = self.floats[entry + 1]
+            t = self.floats[entry + 2]
+            bid_count = min(self.words[entry + 3], limit)
+            ask_count = min(self.words[entry + 4], limit)
+            start = entry + ENTRY_WORDS
+            bids = self.floats[start:start + 2 * bid_count].tolist()
+            asks = self.floats[start + 2 * self.levels:start + 2 * self.levels + 2 * ask_count].tolist()
+            if self.words[entry] == seq:
+                version = int(version) if version.is_integer() else version
+                return version, t, list(zip(bids[::2], bids[1::2])), list(zip(asks[::2], asks[1::2]))
+        return None
+
+    def release(self):
+        # 关闭前要先释放对共享内存的memoryview
+        for view in ("floats", "words"):
+            if hasattr(self, view):
+                getattr(self, view).release()
+                delattr(self, view)
+        self.shm.close()
+
+    def close(self):
+        if self.owner:
+            # 先标记失效，已连接的读进程会重新连接
+            self.words[0] = 0
+        self.release()
+        if self.owner:
+            self.shm.unlink()
+
+
+class DepthPublisher:
+    # 持有交易所连接的进程，每interval秒把各合约前levels档深度写进共享内存
+    # source默认是client本身(REST轮询)，也可以传对应的DepthStream
+    def __init__(self, client, symbols, levels=20, ring=4, interval=0.1, source=None, name="depth", workers=8):
+        self.client = client
+        self.source = source or client
+        self.symbols = list(symbols)
+        self.levels = levels
+        self.interval = interval
+        self.book = SharedBook(segment(client.name, name), self.symbols, levels, ring)
+        self.fan_out = FanOut(workers)
+        self.thread = None
+        self.running = False
+
+    def publish(self, symbol):
+        depth = self.source.depth(symbol, self.levels)
+        if not depth:
+            return False
+        raw, _, _, t = depth
+        self.book.write(symbol, depth_version(raw) or 0, float(t),
+                        self.client.parse_depth(raw, "bids"), self.client.parse_depth(raw, "asks"))
+        return True
+
+    def publish_all(self):
+        results = self.fan_out.map(lambda client, symbol: self.publish(symbol), [self.client], self.symbols)
+        clock = getattr(self.client, "clock", None)
+        self.book.beat(clock.offset if clock else 0)
+        return results
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        while self.running:
+            start = time.time()
+            try:
+                self.publish_all()
+            except Exception as error:
+                log.error("shared_depth", venue=self.client.name, error=error)
+            time.sleep(max(0, self.interval - (time.time() - start)))
+
+    def close(self):
+        self.stop()
+        if self.thread:
+            self.thread.join()
+        self.fan_out.shutdown()
+        self.book.close()
+
+
+# 行情进程入口，阻塞到Ctrl-C，退出时删除共享内存
+def serve(*publishers):
+    for publisher in publishers:
+        publisher.start()
+    log.event("shared_depth", venues=[publisher.client.name for publisher in publishers])
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for publisher in publishers:
+            publisher.close()
+
+
+class SharedDepth:
+    # 策略进程使用，depth()和客户端的签名、返回值一致，不发任何HTTP请求
+    # max_delay与客户端depth()一样按服务器时间过滤过期深度，clock为None时用守护进程写入的时钟偏差
+    # 守护进程的心跳stall秒没有更新时重新打开共享内存，守护进程重启后换到新的共享内存
+    name = None
+
+    def __init__(self, name="depth", max_delay=0.12, clock=None, stall=1):
+        self.segment = segment(self.name, name)
+        self.max_delay = max_delay
+        self.clock = clock
+        self.stall = stall
+        self.book = None
+        self.attempted = 0
+
+    def attach(self):
+        if self.book is not None and not self.book.alive():
+            self.close()
+        if self.book is None:
+            try:
+                self.book = SharedBook(self.segment)
+            except (FileNotFoundError, ValueError):
+                return None
+        return self.book
+
+    def reattach(self):
+        now = time.time()
+        if now - self.attempted < self.stall:
+            return
+        self.attempted = now
+        try:
+            book = SharedBook(self.segment)
+        except (FileNotFoundError, ValueError):
+            return
+        if self.book is not None and book.generation() == self.book.generation():
+            book.release()
+            return
+        self.close()
+        self.book = book
+
+    # 守护进程每轮写一次心跳，长时间不更新说明已停止写入
+    def stalled(self, book):
+        return self.now(book) - book.heartbeat() > self.stall
+
+    def now(self, book):
+        return self.clock.now() if self.clock else time.time() + book.offset()
+
+    def depth(self, symbol, limit):
+        book = self.attach()
+        if book is None or symbol not in book.regions:
+            return False
+        if self.stalled(book):
+            self.reattach()
+            book = self.book
+        snapshot = book.read(symbol, limit)
+        if not snapshot:
+            return False
+        version, t, bids, asks = snapshot
+        if not bids or not asks:
+            return False
+        if self.max_delay is not None and self.now(book) - t > self.max_delay:
+            return False
+        return self.raw(version, t, bids, asks), bids[0][0], asks[0][0], t
+
+    def close(self):
+        if self.book:
+            self.book.release()
+            self.book = None
+
+
+class MexcSharedDepth(SharedDepth):
+    name = "MEXC"
+
+    @staticmethod
+    def raw(version, t, bids, asks):
+        return {"data": {"bids": bids, "asks": asks, "version": version, "timestamp": t * 1000}}
+
+
+class GateSharedDepth(SharedDepth):
+    name = "GATE"
+
+    @staticmethod
+    def raw(version, t, bids, asks):
+        return {
+            "id": version,
+            "current": t,
+            "bids": [{"p": str(p), "s": s} for p, s in bids],
+            "asks": [{"p": str(p), "s": s} for p, s in asks]
+        }
@@ -0,0 +1,107 @@
+import time
+import hashlib
+import hmac
+import json
+from urllib.parse import urlencode
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# sha512("")，gate对没有body的请求要求用空字符串的哈希
+GATE_EMPTY_PAYLOAD = "cf83e1357eefb8bdf1542850d66d8007d620e4050b5715dc83f4a921d36ce9ce" \
+                     "47d0d13c5d85f2b0ff8318d2877eec2f63b931bd47417a81a538327af927da3e"
+
+
+# 签名和实际发送的body用的是同一份bytes，所以序列化方式不影响验签
+def dumps(params):
+    if orjson is not None:
+        return orjson.dumps(params)
+    return json.dumps(params, separators=(",", ":")).encode("utf-8")
+
+
+# mexc GET请求签名用按key排序后的k=v&k=v，items为(key, value)对，验签方也用这个拼接
+def mexc_query(items):
+    return "&".join(sorted(f"{k}={v}" for k, v in items))
+
+
+class Signer:
+    clock = None
+
+    # 有clock时用校准后的服务器时间签名，避免本地时钟偏差导致请求被拒
+    def now(self):
+        return self.clock.now() if self.clock else time.time()
+
+
+class MexcSigner(Signer):
+    def __init__(self, key, secret, clock=None):
+        self.key = key
+        self.clock = clock
+        self.key_bytes = key.encode("utf-8")
+        # 预先用secret初始化好的hmac对象，每次签名copy一份即可
+        self.hmac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(self, *parts):
+        signer = self.hmac.copy()
+        for part in parts:
+            signer.update(part)
+        return signer.hexdigest()
+
+    # 返回(headers, body)，GET请求body为None
+    def headers(self, method, params):
+        t = str(int(self.now() * 1000))
+        if method == "POST":
+            body = dumps(params)
+            signature = self.sign(self.key_bytes, t.encode("utf-8"), body)
+        else:
+            body = None
+            signature = self.sign(self.key_bytes, t.encode("utf-8"), mexc_query(params.items()).encode("utf-8"))
+        headers = {
+            "ApiKey": self.key,
+            "Request-Time": t,
+            "Signature": signature,
+            "Content-Type": "application/json"
+        }
+        return headers, body
+
+    def ws_login(self):
+        t = str(int(self.now() * 1000))
+        signature = self.sign(self.key_bytes, t.encode("utf-8"))
+        return {"method": "login", "param": {"apiKey": self.key, "reqTime": t, "signature": signature}}
+
+
+class GateSigner(Signer):
+    def __init__(self, key, secret, clock=None):
+        self.key = key
+        self.clock = clock
+        self.hmac = hmac.new(secret.encode("utf-8"), digestmod=hashlib.sha512)
+
+    def sign(self, plaintext):
+        signer = self.hmac.copy()
+        signer.update(plaintext.encode("utf-8"))
+        return signer.hexdigest()
+
+    # 返回(headers, query, body)，query需要原样拼在url后面发送，保证与签名一致
+    def headers(self, method, url, params, query_post=False):
+        payload = GATE_EMPTY_PAYLOAD
+        query = ""
+        body = None
+        if method == "POST" and not query_post:
+            body = dumps(params)
+            payload = hashlib.sha512(body).hexdigest()
+        else:
+            query = urlencode(params)
+        t = str(self.now())
+        signature = self.sign("%s\n%s\n%s\n%s\n%s" % (method, url, query, payload, t))
+        headers = {
+            "Key": self.key,
+            "Timestamp": t,
+            "SIGN": signature,
+            "Content-Type": "application/json"
+        }
+        return headers, query, body
+
+    def ws_auth(self, channel, event, t):
+        signature = self.sign("channel=%s&event=%s&time=%d" % (channel, event, t))
+        return {"method": "api_key", "KEY": self.key, "SIGN": signature}
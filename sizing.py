@@ -0,0 +1,123 @@
+from bisect import bisect_left, bisect_right
+from orderbook import OrderBook
+
+
+class Size:
+    __slots__ = ("side", "quantity", "filled", "price", "vwap", "best", "notional")
+
+    # quantity为想要成交的张数，filled为按当前深度IOC能成交的张数，price为吃到filled需要挂的限价
+    def __init__(self, side, quantity, filled, price, vwap, best, notional):
+        self.side = side
+        self.quantity = quantity
+        self.filled = filled
+        self.price = price
+        self.vwap = vwap
+        self.best = best
+        self.notional = notional
+
+    def slippage(self):
+        if self.vwap is None or not self.best:
+            return None
+        return abs(self.vwap - self.best) / self.best
+
+    # 按当前深度估计的成交比例，深度变化前IOC的成交量不会超过它
+    def fill_ratio(self):
+        return self.filled / self.quantity if self.quantity else 0
+
+    def complete(self):
+        return self.filled >= self.quantity
+
+    def __repr__(self):
+        return f"<Size {self.side} {self.filled}/{self.quantity} @{self.price} vwap {self.vwap}>"
+
+
+# mexc用data.version，gate带with_id时用id，否则用服务器时间区分不同快照
+def depth_version(depth):
+    data = depth.get("data")
+    if isinstance(data, dict):
+        return data.get("version") or data.get("timestamp")
+    return depth.get("id") or depth.get("current")
+
+
+# cap为按滑点限制后最多吃的张数，结果里的quantity仍是原始需求
+def walk(book, quantity, cap=None):
+    filled, notional, worst = book.fill(quantity if cap is None else min(quantity, cap))
+    return Size(book.side, quantity, filled, worst, notional / filled if filled else None, book.best(), notional)
+
+
+# 把以计价币计的成交额换算成需要吃掉的张数，multiplier为每张合约对应的币数量
+def contracts_for(book, notional, multiplier=1):
+    book.cumulative()
+    target = notional / multiplier
+    cumulative_notional = book.cumulative_notional
+    if not cumulative_notional or target <= 0:
+        return 0
+    i = bisect_left(cumulative_notional, target)
+    if i >= len(cumulative_notional):
+        return book.cumulative_sizes[-1]
+    filled_before = book.cumulative_sizes[i - 1] if i else 0
+    notional_before = cumulative_notional[i - 1] if i else 0
+    return filled_before + (target - notional_before) / book.prices[i]
+
+
+# 价格不差于best*(1±max_slippage)的档位上一共能成交的张数
+def within(book, max_slippage):
+    if not len(book):
+        return 0
+    best = book.prices[0]
+    if book.side == "asks":
+        i = bisect_right(book.prices, best * (1 + max_slippage))
+    else:
+        # bids从高到低排列，取反后升序
+        i = bisect_right([-price for price in book.prices], -best * (1 - max_slippage))
+    return book.cumulative()[i - 1] if i else 0
+
+
+class Sizer:
+    # 每个(交易所, 交易对, 方向)只保留最新版本的深度，同一版本的计算结果直接复用
+    def __init__(self):
+        self.books = {}
+        self.results = {}
+
+    def cached(self, venue, symbol, side, version):
+        cached = self.books.get((venue, symbol, side))
+        if cached is not None and version is not None and cached[0] == version:
+            return cached[1]
+        return None
+
+    # lines为parse_depth的输出，每档[价格, 数量, ...]，gate的数量可能为负
+    def book(self, venue, symbol, side, lines, version):
+        key = (venue, symbol, side)
+        book = OrderBook(side, [float(line[0]) for line in lines], [abs(float(line[1])) for line in lines])
+        self.books[key] = (version, book)
+        self.results[key] = {}
+        return book
+
+    # depth为client.depth()返回的原始深度，版本没变时不重新解析
+    def from_depth(self, client, symbol, depth, side):
+        version = depth_version(depth)
+        book = self.cached(client.name, symbol, side, version)
+        if book is None:
+            book = self.book(client.name, symbol, side, client.parse_depth(depth, side), version)
+        return book
+
+    def size(self, venue, symbol, side, contracts=None, notional=None, multiplier=1, max_slippage=None):
+        key = (venue, symbol, side)
+        book = self.books[key][1]
+        cache_key = (contracts, notional, multiplier, max_slippage)
+        results = self.results[key]
+        if cache_key not in results:
+            quantity = contracts if contracts is not None else contracts_for(book, notional, multiplier)
+            cap = within(book, max_slippage) if max_slippage is not None else None
+            results[cache_key] = walk(book, quantity, cap)
+        return results[cache_key]
+
+    # 取最新深度并给出按当前流动性能成交的数量和需要的限价，side为"buy"/"sell"
+    def order_size(self, client, symbol, side, contracts=None, notional=None, max_slippage=None, limit=20):
+        depth = client.depth(symbol, limit)
+        if not depth:
+            return None
+        book_side = "asks" if side == "buy" else "bids"
+        self.from_depth(client, symbol, depth[0], book_side)
+        multiplier = client.multiplier(symbol) if notional is not None else 1
+        return self.size(client.name, symbol, book_side, contracts, notional, multiplier, max_slippage)
@@ -0,0 +1,31 @@
+import os
+import sys
+import pytest
+import requests
+
+# 仓库是平铺的模块，测试时把仓库根目录加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mock_server import MockExchange
+from exchange import create
+# 导入时注册各交易所客户端
+import cex
+import cex_future
+
+
+@pytest.fixture
+def exchange():
+    with MockExchange() as exchange:
+        yield exchange
+
+
+# 返回指向MockExchange的客户端工厂：client("GATE", "future", account_max_age=60)
+@pytest.fixture
+def client(exchange):
+    def client(venue, kind, **kwargs):
+        if kind == "future":
+            instance = create(venue, kind, "127.0.0.1", "key", "secret", 10, warm_up=False, **kwargs)
+        else:
+            instance = create(venue, kind, requests.Session(), "key", "secret", **kwargs)
+        instance.base = exchange.url
+        return instance
+    return client
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from cex_stream import MexcAccountStream, GateAccountStream
+from ws_replay import ReplayServer, wait_for
+
+
+def rest_calls(exchange, path):
+    return sum(1 for method, request_path in exchange.requests if request_path == path)
+
+
+# 没有私有推送时，自己的订单成交后get_position不能返回成交前缓存的持仓
+def test_position_refreshed_after_own_fill_without_stream(client):
+    gate = client("GATE", "future", account_max_age=60)
+    assert gate.get_position("BTC_USDT") == 0
+    assert gate.order("BTC_USDT", 100.0, 3, "t-1", 1) == 3
+    assert gate.get_position("BTC_USDT") == 3
+    assert gate.place_orders([("BTC_USDT", 100.0, -2, "t-2", 1)])[0][0]
+    assert gate.get_position("BTC_USDT") == 1
+    mexc = client("MEXC", "future", account_max_age=60)
+    assert mexc.get_position("BTC_USDT") == 0
+    assert mexc.order("BTC_USDT", 100.0, -5, "e-1", 1) == 5
+    assert mexc.get_position("BTC_USDT") == -5
+
+
+# 查持仓只拉持仓；只是超过max_age时先返回旧值，刷新在后台完成
+def test_position_read_fetches_only_positions(exchange, client):
+    gate = client("GATE", "future", account_max_age=0.05)
+    assert gate.order("BTC_USDT", 100.0, 3, "t-1", 1) == 3
+    assert gate.get_position("BTC_USDT") == 3
+    assert rest_calls(exchange, "/api/v4/futures/usdt/positions") == 1
+    assert rest_calls(exchange, "/api/v4/futures/usdt/accounts") == 0
+    time.sleep(0.1)
+    assert gate.get_position("BTC_USDT") == 3
+    asyncio.run(wait_for(lambda: rest_calls(exchange, "/api/v4/futures/usdt/positions") == 2))
+    asyncio.run(wait_for(lambda: not gate.account.pending))
+    assert not gate.account.stale("position")
+    assert rest_calls(exchange, "/api/v4/futures/usdt/accounts") == 0
+
+
+def test_mexc_account_stream_replay(exchange, client):
+    async def main():
+        mexc = client("MEXC", "future")
+        server = ReplayServer()
+        stream = MexcAccountStream(mexc, url=await server.start())
+        stream.running = True
+        task = asyncio.create_task(stream.run())
+        try:
+            # 连接后先登录，再用REST对账，之后只用推送
+            await wait_for(lambda: mexc.account.streaming)
+            assert server.received[0]["method"] == "login"
+            assert rest_calls(exchange, "/api/v1/private/position/open_positions") == 1
+            await server.send({"channel": "push.personal.position", "data": {
+                "symbol": "BTC_USDT", "holdVol": 7, "positionType": 2, "state": 1}})
+            await server.send({"channel": "push.personal.asset", "data": {
+                "currency": "USDT", "availableBalance": 900, "frozenBalance": 100}})
+            await wait_for(lambda: mexc.account.balances.get("USDT") == (900, 100))
+            assert mexc.get_position("BTC_USDT") == -7
+            assert mexc.balance() == 900
+            # 推送期间查询不发REST请求，自己下单后也不需要
+            mexc.order("BTC_USDT", 100.0, 1, "e-1", 1)
+            assert mexc.get_position("BTC_USDT") == -7
+            assert rest_calls(exchange, "/api/v1/private/position/open_positions") == 1
+            await server.send({"channel": "push.personal.position", "data": {
+                "symbol": "BTC_USDT", "holdVol": 7, "positionType": 2, "state": 3}})
+            await wait_for(lambda: "BTC_USDT" not in mexc.account.positions)
+            # 断线后不再信任内存状态，重连后重新对账
+            await server.drop()
+            await wait_for(lambda: not mexc.account.streaming)
+            await wait_for(lambda: mexc.account.streaming)
+            assert rest_calls(exchange, "/api/v1/private/position/open_positions") == 2
+            assert mexc.get_position("BTC_USDT") == 1
+        finally:
+            stream.stop()
+            await task
+            await server.stop()
+    asyncio.run(main())
+
+
+def test_gate_account_stream_replay(exchange, client):
+    async def main():
+        gate = client("GATE", "future")
+        server = ReplayServer()
+        stream = GateAccountStream(gate, 42, url=await server.start())
+        stream.running = True
+        task = asyncio.create_task(stream.run())
+        try:
+            await wait_for(lambda: gate.account.streaming)
+            channels = [message["channel"] for message in server.received]
+            assert channels == ["futures.balances", "futures.positions"]
+            assert all(message["auth"]["KEY"] == "key" for message in server.received)
+            await server.send({"time": 1, "channel": "futures.positions", "event": "update", "result": [
+                {"contract": "BTC_USDT", "size": -4, "user": "42"}]})
+            await wait_for(lambda: gate.account.positions.get("BTC_USDT") == -4)
+            assert gate.get_position("BTC_USDT") == -4
+            # 余额推送只有总额，收到后后台用REST对账
+            accounts = rest_calls(exchange, "/api/v4/futures/usdt/accounts")
+            await server.send({"time": 2, "channel": "futures.balances", "event": "update", "result": [
+                {"balance": 1000, "change": 1, "text": "", "user": "42"}]})
+            await wait_for(lambda: rest_calls(exchange, "/api/v4/futures/usdt/accounts") == accounts + 1)
+            assert gate.balance() == 1000
+        finally:
+            stream.stop()
+            await task
+            await server.stop()
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+import asyncio
+from exchange import FanOut, key
+from cex_async import AsyncGate
+
+
+def test_spot_balance_keyword_is_unified(client):
+    spot, gate = client("MEXC", "spot"), client("GATE", "spot")
+    for instance in (spot, gate):
+        assert float(instance.balance("USDT", include_frozen=True)) == 1000
+        assert instance.available("USDT") == 1000
+        assert instance.available("USDT", include_frozen=True) == 1000
+    # 原来的参数名仍然可用
+    assert float(spot.balance("USDT", includ_frozen=True)) == 1000
+    assert float(gate.balance("USDT", include_locked=True)) == 1000
+
+
+def test_fan_out_keeps_spot_and_future_of_same_venue(client):
+    spot, future = client("MEXC", "spot"), client("MEXC", "future")
+    fan_out = FanOut(4)
+    results = fan_out.map(lambda client, symbol: client.kind, [spot, future], ["BTC_USDT"])
+    fan_out.shutdown()
+    assert results == {("MEXC", "spot", "BTC_USDT"): "spot", ("MEXC", "future", "BTC_USDT"): "future"}
+    assert key(future, "BTC_USDT") == ("MEXC", "future", "BTC_USDT")
+
+
+# 异步现货price()走行情缓存，同时过期的多个请求只下载一次全量行情
+def test_async_spot_price_served_from_ticker_cache(exchange):
+    async def main(exchange):
+        async with AsyncGate("127.0.0.1", "key", "secret", ticker_interval=60) as gate:
+            gate.base = exchange.url
+            prices = await asyncio.gather(*[gate.price("BTC_USDT") for _ in range(8)])
+            assert prices == [100.0] * 8
+            assert await gate.price("BTC_USDT") == 100.0
+        return sum(1 for method, path in exchange.requests if path == "/api/v4/spot/tickers")
+    assert asyncio.run(main(exchange)) == 1
+
+
+# 现货客户端在第一次请求前校准一次服务器时间，之后不再重复校准
+def test_spot_clock_synced_on_first_request(exchange, client):
+    spot, gate = client("MEXC", "spot"), client("GATE", "spot")
+    for instance, path in ((spot, "/open/api/v2/common/timestamp"), (gate, "/api/v4/spot/time")):
+        assert not instance.clock.time
+        instance.tiker()
+        instance.tiker()
+        assert instance.clock.time and instance.clock.rtt is not None
+        assert sum(1 for method, request_path in exchange.requests if request_path == path) == instance.clock.samples
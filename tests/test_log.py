@@ -0,0 +1,12 @@
+import json
+import log
+
+
+# 没有调用setup时WARNING及以上仍然输出到stderr，INFO不输出
+def test_warning_goes_to_stderr_without_setup(capsys):
+    log.stop()
+    log.event("quiet", symbol="BTC_USDT")
+    log.warning("depth_stale", symbol="BTC_USDT", delay=150)
+    log.stop()
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [(line["level"], line["event"], line["delay"]) for line in lines] == [("WARNING", "depth_stale", 150)]
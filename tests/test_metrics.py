@@ -0,0 +1,45 @@
+import pytest
+from metrics import Histogram, SUB_BUCKETS, endpoint_name
+
+SAMPLES = list(range(0, 5000)) + [2 ** shift + offset for shift in range(12, 40) for offset in (-1, 0, 1)]
+
+
+def test_small_values_are_exact():
+    for micros in range(SUB_BUCKETS):
+        assert Histogram.bucket(micros) == micros
+        assert Histogram.upper(micros) == micros
+
+
+def test_upper_bounds_value_within_relative_error():
+    for micros in SAMPLES:
+        upper = Histogram.upper(Histogram.bucket(micros))
+        assert micros <= upper <= micros * (1 + 1 / SUB_BUCKETS)
+
+
+def test_buckets_are_monotonic_and_contiguous():
+    buckets = [Histogram.bucket(micros) for micros in range(100000)]
+    assert all(0 <= b - a <= 1 for a, b in zip(buckets, buckets[1:]))
+    # 每个桶的上界是落在该桶里的最大值
+    for micros in range(1, 100000):
+        if buckets[micros] != buckets[micros - 1]:
+            assert Histogram.upper(buckets[micros - 1]) == micros - 1
+
+
+def test_percentile_and_max():
+    histogram = Histogram()
+    for micros in range(1, 1001):
+        histogram.record(micros / 1e6)
+    assert histogram.percentile(50) == pytest.approx(500e-6, rel=1 / SUB_BUCKETS)
+    assert histogram.percentile(99) == pytest.approx(990e-6, rel=1 / SUB_BUCKETS)
+    # 分位数不超过实际最大值
+    assert histogram.percentile(100) == histogram.max == 1000e-6
+    assert Histogram().percentile(50) == 0
+
+
+@pytest.mark.parametrize("url, name", [
+    ("/api/v1/contract/depth/BTC_USDT?limit=20", "/api/v1/contract/depth/{}"),
+    ("/api/v4/futures/usdt/orders/t-12", "/api/v4/futures/usdt/orders/{}"),
+    ("/api/v4/futures/usdt/positions/BTC_USDT/leverage", "/api/v4/futures/usdt/positions/{}/leverage"),
+])
+def test_endpoint_name(url, name):
+    assert endpoint_name(url) == name
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import pytest
+from retry import RetryPolicy, RetryError, FatalError, mexc_retryable, gate_retryable
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize("response, retryable", [
+    (ConnectionError("reset"), True),
+    # 现货v2失败时是原始文本，合约是解析后的dict
+    (json.dumps({"code": 429, "msg": "too many requests"}), True),
+    ({"success": False, "code": 510, "message": "frequent"}, True),
+    ({"success": False, "code": 503}, True),
+    ({"success": False, "code": 2005, "message": "balance insufficient"}, False),
+    ('{"code": 400, "msg": "invalid symbol"}', False),
+    # 不是json的响应(网关错误页等)无法判断，按可重试处理
+    ("<html>502 Bad Gateway</html>", True),
+])
+def test_mexc_retryable(response, retryable):
+    assert mexc_retryable(response) is retryable
+
+
+@pytest.mark.parametrize("response, retryable", [
+    (TimeoutError(), True),
+    (Response(429), True),
+    (Response(502), True),
+    (Response(400), False),
+    (Response(404), False),
+    ({"label": "TOO_MANY_REQUESTS"}, True),
+    ({"label": "SERVER_ERROR"}, True),
+    ({"label": "INVALID_PARAM_VALUE"}, False),
+    ('{"label": "BALANCE_NOT_ENOUGH"}', False),
+])
+def test_gate_retryable(response, retryable):
+    assert gate_retryable(response) is retryable
+
+
+def responses(*items):
+    items = iter(items)
+    calls = []
+
+    def fn(*args):
+        calls.append(args)
+        return next(items)
+    return fn, calls
+
+
+def test_fatal_response_is_not_retried():
+    fn, calls = responses((False, {"code": 2005}))
+    with pytest.raises(FatalError) as caught:
+        RetryPolicy(base=0).call(fn, "GET", name="mexc balance", retryable=mexc_retryable)
+    assert len(calls) == 1
+    assert caught.value.attempts == 1
+
+
+def test_retryable_response_is_retried_until_success():
+    fn, calls = responses((False, {"code": 510}), (False, ConnectionError()), (True, {"code": 200}))
+    assert RetryPolicy(base=0).call(fn, "GET", name="mexc tiker", retryable=mexc_retryable) == {"code": 200}
+    assert calls == [("GET",)] * 3
+
+
+def test_retries_stop_at_max_attempts():
+    fn, calls = responses(*[(False, Response(503))] * 5)
+    with pytest.raises(RetryError) as caught:
+        RetryPolicy(max_attempts=3, base=0).call(fn, name="gate fills", retryable=gate_retryable)
+    assert not isinstance(caught.value, FatalError)
+    assert caught.value.attempts == 3
+    assert caught.value.status == 503
+    assert len(calls) == 3
+
+
+def test_acall_classifies_like_call():
+    async def fn():
+        return False, Response(400)
+    with pytest.raises(FatalError):
+        asyncio.run(RetryPolicy(base=0).acall(fn, name="gate get_order", retryable=gate_retryable))
@@ -0,0 +1,86 @@
+import pytest
+import scheduler
+from scheduler import Scheduler, endpoint_kind
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(scheduler, "time", clock)
+    return clock
+
+
+# 出口IP总额10个令牌，每秒补10个；各接口自身的限额放宽，只看总额和保留比例
+def limited(order=(100, 100)):
+    return Scheduler({("MEXC", "ip"): (10, 10), ("MEXC", "order"): order, ("MEXC", "private"): (100, 100),
+                      ("MEXC", "public"): (100, 100)})
+
+
+def drain(instance, kind, ip="1.1.1.1"):
+    count = 0
+    while instance.try_acquire("MEXC", kind, ip) == 0:
+        count += 1
+    return count
+
+
+def test_reserve_keeps_tokens_for_higher_priority(clock):
+    instance = limited()
+    # 行情留40%：10个里只能用6个
+    assert drain(instance, "public") == 6
+    # 私有查询留20%：还能再用2个
+    assert drain(instance, "private") == 2
+    # 下单可以用完
+    assert drain(instance, "order") == 2
+
+
+def test_wait_time_accounts_for_reserve(clock):
+    instance = limited()
+    drain(instance, "order")
+    # 总额为0时，下单等1个令牌，行情要等到补满保留的4个再多1个
+    assert instance.try_acquire("MEXC", "order", "1.1.1.1") == pytest.approx(0.1)
+    assert instance.try_acquire("MEXC", "private", "1.1.1.1") == pytest.approx(0.3)
+    assert instance.try_acquire("MEXC", "public", "1.1.1.1") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert instance.try_acquire("MEXC", "public", "1.1.1.1") == 0
+
+
+def test_endpoint_limit_applies_before_total(clock):
+    instance = limited(order=(1, 2))
+    assert drain(instance, "order") == 2
+    assert instance.try_acquire("MEXC", "order", "1.1.1.1") == pytest.approx(1)
+    # 下单用完不影响同一IP的私有查询
+    assert instance.try_acquire("MEXC", "private", "1.1.1.1") == 0
+
+
+def test_limits_are_per_ip(clock):
+    instance = limited()
+    assert drain(instance, "order", "1.1.1.1") == 10
+    assert drain(instance, "order", "2.2.2.2") == 10
+
+
+def test_public_requests_go_to_ip_with_most_headroom(clock):
+    instance = limited()
+    drain(instance, "order", "1.1.1.1")
+    assert instance.pick("MEXC", "public", "1.1.1.1", ["1.1.1.1", "2.2.2.2"]) == "2.2.2.2"
+    # 下单和私有查询固定走自己的IP
+    assert instance.pick("MEXC", "order", "1.1.1.1", ["1.1.1.1", "2.2.2.2"]) == "1.1.1.1"
+
+
+@pytest.mark.parametrize("method, url, kind", [
+    ("GET", "/api/v1/contract/depth/BTC_USDT", "public"),
+    ("GET", "/api/v4/futures/usdt/order_book", "public"),
+    ("POST", "/api/v1/private/order/submit", "order"),
+    ("DELETE", "/open/api/v2/order/cancel", "order"),
+    ("GET", "/api/v4/futures/usdt/orders/t-1", "private"),
+    ("GET", "/api/v1/private/account/assets", "private"),
+])
+def test_endpoint_kind(method, url, kind):
+    assert endpoint_kind(method, url) == kind
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import time
+import pytest
+import shared_depth
+from cex_future import GateFuture
+from shared_depth import DepthPublisher, GateSharedDepth, SharedBook, NAME_BYTES
+
+SYMBOLS = ["BTC_USDT", "ETH_USDT"]
+
+
+def publisher(client, name):
+    return DepthPublisher(client("GATE", "future"), SYMBOLS, levels=5, interval=0.02, name=name)
+
+
+def wait_depth(reader, symbol="BTC_USDT", timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        depth = reader.depth(symbol, 5)
+        if depth:
+            return depth
+        time.sleep(0.01)
+    return False
+
+
+def test_reader_matches_client_depth_across_processes(client):
+    daemon = publisher(client, "test_cross")
+    daemon.start()
+    try:
+        reader = GateSharedDepth("test_cross")
+        raw, bid, ask, t = wait_depth(reader)
+        assert (bid, ask) == (99.9, 100.1)
+        assert [line[0] for line in GateFuture.parse_depth(raw, "asks")] == [100.1, 100.2, 100.3, 100.4, 100.5]
+        assert reader.depth("XRP_USDT", 5) is False
+        code = ("import sys; sys.path.insert(0, sys.argv[1])\n"
+                "from shared_depth import GateSharedDepth\n"
+                "depth = GateSharedDepth('test_cross', max_delay=1).depth('ETH_USDT', 3)\n"
+                "print(depth[1], depth[2], len(depth[0]['bids']))")
+        root = os.path.dirname(os.path.abspath(shared_depth.__file__))
+        output = subprocess.run([sys.executable, "-c", code, root], capture_output=True, text=True)
+        assert output.stdout.split() == ["99.9", "100.1", "3"], output.stderr
+        # 读进程退出后共享内存仍然可用
+        assert reader.depth("BTC_USDT", 5)
+        reader.close()
+    finally:
+        daemon.close()
+
+
+def test_reader_rejects_stale_depth_and_reattaches_after_restart(client):
+    daemon = publisher(client, "test_restart")
+    daemon.start()
+    reader = GateSharedDepth("test_restart", stall=0.1)
+    try:
+        assert wait_depth(reader)
+        generation = reader.book.generation()
+        # 守护进程停止写入后，超过max_delay的深度不再返回
+        daemon.stop()
+        daemon.thread.join()
+        time.sleep(0.2)
+        assert reader.depth("BTC_USDT", 5) is False
+        # 模拟守护进程崩溃后重启：旧共享内存没有标记失效就被删除，新进程建了同名共享内存
+        daemon.book.release()
+        daemon.book.shm.unlink()
+        daemon.fan_out.shutdown()
+        daemon = publisher(client, "test_restart")
+        daemon.start()
+        assert wait_depth(reader)
+        assert reader.book.generation() != generation
+        # 正常关闭时读进程马上换到新的共享内存
+        generation = reader.book.generation()
+        daemon.close()
+        assert reader.depth("BTC_USDT", 5) is False
+        daemon = publisher(client, "test_restart")
+        daemon.start()
+        assert wait_depth(reader)
+        assert reader.book.generation() != generation
+    finally:
+        reader.close()
+        daemon.close()
+
+
+# 超长的合约名会覆盖下一个合约的名字，创建时直接拒绝，不留下共享内存
+def test_symbol_longer_than_name_bytes_is_rejected():
+    with pytest.raises(ValueError):
+        SharedBook("test_long_name", ["BTC_USDT", "X" * (NAME_BYTES + 1)])
+    book = SharedBook("test_long_name", ["BTC_USDT", "X" * NAME_BYTES])
+    reader = SharedBook("test_long_name")
+    try:
+        assert reader.symbols == ["BTC_USDT", "X" * NAME_BYTES]
+    finally:
+        reader.release()
+        book.close()
@@ -0,0 +1,58 @@
+import pytest
+from orderbook import OrderBook
+from sizing import contracts_for, within, walk
+
+# 卖盘100/101/102各10张，买盘99/98/97各10张
+ASKS = OrderBook("asks", [100.0, 101.0, 102.0], [10.0, 10.0, 10.0])
+BIDS = OrderBook("bids", [99.0, 98.0, 97.0], [10.0, 10.0, 10.0])
+
+
+@pytest.mark.parametrize("notional, contracts", [
+    (500, 5),
+    # 正好吃完第一档
+    (1000, 10),
+    # 第一档1000，剩下505在101上吃5张
+    (1505, 15),
+    (3030, 30),
+    # 深度不够时返回全部深度
+    (5000, 30),
+    (0, 0),
+])
+def test_contracts_for_asks(notional, contracts):
+    assert contracts_for(ASKS, notional) == pytest.approx(contracts)
+
+
+def test_contracts_for_uses_multiplier():
+    # 每张0.1个币，1505计价币换算成15050个币的名义价值
+    assert contracts_for(ASKS, 150.5, multiplier=0.1) == pytest.approx(15)
+    assert contracts_for(BIDS, 99 * 10 + 98 * 5) == pytest.approx(15)
+
+
+def test_contracts_for_empty_book():
+    assert contracts_for(OrderBook("asks", [], []), 100) == 0
+
+
+@pytest.mark.parametrize("book, max_slippage, contracts", [
+    (ASKS, 0, 10),
+    (ASKS, 0.0099, 10),
+    # 101刚好在1%以内
+    (ASKS, 0.01, 20),
+    (ASKS, 0.05, 30),
+    (BIDS, 0, 10),
+    (BIDS, 0.0102, 20),
+    (BIDS, 0.05, 30),
+])
+def test_within(book, max_slippage, contracts):
+    assert within(book, max_slippage) == contracts
+
+
+def test_within_empty_book():
+    assert within(OrderBook("bids", [], []), 0.01) == 0
+
+
+def test_walk_caps_at_slippage_limit():
+    size = walk(ASKS, 25, cap=within(ASKS, 0.01))
+    assert (size.quantity, size.filled, size.price) == (25, 20, 101.0)
+    assert size.vwap == pytest.approx(100.5)
+    assert not size.complete()
+    assert size.fill_ratio() == pytest.approx(0.8)
@@ -0,0 +1,113 @@
+import time
+import pytest
+import volume
+from mock_server import mexc
+from volume import VolumeTracker
+
+
+class Orders:
+    # 两个交易所现货的订单接口共用一份订单：[{"id", "side", "time"(秒), "amount", "open"}]
+    def __init__(self, exchange):
+        self.orders = []
+
+        @exchange.route("GET", r"/open/api/v2/order/list")
+        def mexc_orders(match, params, data):
+            return mexc([{"id": order["id"], "type": "BID" if order["side"] == "buy" else "ASK",
+                          "create_time": int(order["time"] * 1000), "deal_amount": str(order["amount"])}
+                         for order in self.select(False, params["start_time"])], 200)
+
+        @exchange.route("GET", r"/open/api/v2/order/open_orders")
+        def mexc_open_orders(match, params, data):
+            return mexc([{"id": order["id"], "create_time": int(order["time"] * 1000)}
+                         for order in self.select(True)], 200)
+
+        @exchange.route("GET", r"/api/v4/spot/orders")
+        def gate_orders(match, params, data):
+            orders = self.select(params["status"] == "open", params.get("from"))
+            return 200, [{"id": order["id"], "side": order["side"], "create_time_ms": order["time"] * 1000,
+                          "filled_total": str(order["amount"])} for order in orders]
+
+    def select(self, open_orders, since=None):
+        return [order for order in self.orders
+                if order["open"] == open_orders and (since is None or order["time"] >= int(since))]
+
+    def add(self, order_id, side, age, amount, open_order=False):
+        self.orders.append({"id": order_id, "side": side, "time": time.time() - age, "amount": amount,
+                            "open": open_order})
+
+    def fill(self, order_id):
+        for order in self.orders:
+            if order["id"] == order_id:
+                order["open"] = False
+
+
+def spot(client, venue):
+    instance = client(venue, "spot")
+    # 每次amount都重新拉取
+    instance.volumes.interval = 0
+    return instance
+
+
+@pytest.mark.parametrize("venue", ["MEXC", "GATE"])
+def test_resting_order_filled_after_cursor_is_counted(exchange, client, venue):
+    orders = Orders(exchange)
+    instance = spot(client, venue)
+    # 挂了10分钟还没成交的卖单，游标停在它的创建时间
+    orders.add("1", "sell", 600, 50, open_order=True)
+    orders.add("2", "buy", 30, 10)
+    assert instance.amount("BTC_USDT", "buy") == 10
+    assert instance.amount("BTC_USDT", "sell") == 0
+    # 挂单成交后，按创建时间查询仍能查到它
+    orders.fill("1")
+    assert instance.amount("BTC_USDT", "sell") == 50
+    assert instance.amount("BTC_USDT", "buy") == 10
+
+
+@pytest.mark.parametrize("venue", ["MEXC", "GATE"])
+def test_orders_seen_twice_are_counted_once(exchange, client, venue):
+    orders = Orders(exchange)
+    instance = spot(client, venue)
+    orders.add("1", "buy", 30, 10)
+    orders.add("2", "buy", 20, 5)
+    # lookback让每次拉取都和上次重叠，同一订单反复返回
+    for _ in range(3):
+        assert instance.amount("BTC_USDT", "buy") == 15
+    orders.add("3", "buy", 1, 1)
+    assert instance.amount("BTC_USDT", "buy") == 16
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(10000)
+    monkeypatch.setattr(volume, "time", clock)
+    return clock
+
+
+def test_fills_leave_the_window(clock):
+    tracker = VolumeTracker(window=100)
+    tracker.update("BTC_USDT", [("1", "buy", 9950, 10), ("2", "buy", 9990, 5), ("3", "sell", 9950, 7)], 10000)
+    assert tracker.amount("BTC_USDT", "buy") == 15
+    clock.now = 10060
+    assert tracker.amount("BTC_USDT", "buy") == 5
+    assert tracker.amount("BTC_USDT", "sell") == 0
+    # 移出窗口的订单id一起删除，不会无限增长
+    assert set(tracker.ids["BTC_USDT"]) == {"2"}
+    assert tracker.fills[("BTC_USDT", "sell")] == []
+
+
+def test_fills_older_than_window_are_ignored(clock):
+    tracker = VolumeTracker(window=100)
+    tracker.update("BTC_USDT", [("1", "buy", 9800, 10), ("2", "buy", 9950, 5)], 10000)
+    assert tracker.amount("BTC_USDT", "buy") == 5
+    assert set(tracker.ids["BTC_USDT"]) == {"2"}
+    # 窗口起点之前的游标不会让since超出窗口
+    tracker.update("BTC_USDT", [], 9000)
+    assert tracker.since("BTC_USDT") == 9900
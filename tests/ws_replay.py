@@ -0,0 +1,61 @@
+import asyncio
+import json
+from aiohttp import web, WSMsgType
+
+
+# 本地WebSocket回放服务器，测试里用send()按顺序推送录制的消息，received记录客户端发来的消息
+class ReplayServer:
+    def __init__(self):
+        self.received = []
+        self.sockets = []
+        self.connected = asyncio.Event()
+        self.runner = None
+        self.url = None
+
+    @staticmethod
+    def load(path):
+        with open(path) as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}/"
+        return self.url
+
+    async def stop(self):
+        for ws in self.sockets:
+            await ws.close()
+        await self.runner.cleanup()
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        self.connected.set()
+        async for message in ws:
+            if message.type == WSMsgType.TEXT:
+                self.received.append(json.loads(message.data))
+        return ws
+
+    async def send(self, message):
+        await self.connected.wait()
+        await self.sockets[-1].send_str(json.dumps(message))
+
+    # 断开当前连接，客户端会自动重连
+    async def drop(self):
+        self.connected.clear()
+        await self.sockets[-1].close()
+
+
+async def wait_for(condition, timeout=5):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise TimeoutError("condition not met")
+        await asyncio.sleep(0.01)
@@ -0,0 +1,78 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+
+class VolumeTracker:
+    # 按交易对和方向累计窗口内已结束订单的成交金额，只增量拉取新订单
+    def __init__(self, window=3600, interval=1, lookback=60):
+        self.window = window
+        self.interval = interval
+        # 订单接口按创建时间查询，游标为上次拉取时仍未结束的最早订单的创建时间(没有则为拉取开始时间)，
+        # 挂单很久才成交的卖单下次仍会被查到；lookback只用来覆盖本地与服务器的时钟误差
+        self.lookback = lookback
+        self.fills = {}
+        self.totals = {}
+        self.ids = {}
+        self.cursors = {}
+        self.times = {}
+        self.lock = threading.Lock()
+
+    def since(self, symbol):
+        start = time.time() - self.window
+        if symbol in self.cursors:
+            return max(start, self.cursors[symbol] - self.lookback)
+        return start
+
+    def stale(self, symbol):
+        return time.time() - self.times.get(symbol, 0) > self.interval
+
+    # 先记下拉取开始时间并查询未结束订单的创建时间，再拉取已结束订单，两次查询之间结束的订单靠id去重
+    def cursor(self, start, open_times):
+        return min([start] + list(open_times))
+
+    # fills为[(订单id, "buy"/"sell", 创建时间(秒), 成交金额)]，重复的订单id会被忽略，cursor为下次拉取的起点
+    def update(self, symbol, fills, cursor):
+        start = time.time() - self.window
+        with self.lock:
+            seen = self.ids.setdefault(symbol, {})
+            for order_id, side, t, amount in fills:
+                if order_id in seen or t < start:
+                    continue
+                seen[order_id] = t
+                insort(self.fills.setdefault((symbol, side), []), (t, order_id, amount))
+                self.totals[(symbol, side)] = self.totals.get((symbol, side), 0) + amount
+            self.cursors[symbol] = cursor
+            self.times[symbol] = time.time()
+            self.evict(symbol, start)
+
+    def evict(self, symbol, start):
+        for side in ("buy", "sell"):
+            fills = self.fills.get((symbol, side))
+            if not fills or fills[0][0] >= start:
+                continue
+            index = bisect_left(fills, (start,))
+            for t, order_id, amount in fills[:index]:
+                self.totals[(symbol, side)] -= amount
+                self.ids[symbol].pop(order_id, None)
+            del fills[:index]
+            if not fills:
+                # 清空时归零，避免浮点误差累积
+                self.totals[(symbol, side)] = 0
+
+    def amount(self, symbol, side):
+        with self.lock:
+            self.evict(symbol, time.time() - self.window)
+            return self.totals.get((symbol, side), 0)
+
+    def reset(self, symbol=None):
+        with self.lock:
+            for store in (self.ids, self.cursors, self.times):
+                if symbol:
+                    store.pop(symbol, None)
+                else:
+                    store.clear()
+            for key in list(self.fills):
+                if not symbol or key[0] == symbol:
+                    self.fills.pop(key)
+                    self.totals.pop(key)